@@ -18,22 +18,65 @@ import argparse
 import logging
 from datetime import datetime
 from time import sleep
+from zoneinfo import ZoneInfo
+from fink_watch.animation import animate
+from fink_watch.backends import SimulatedBackend
 from fink_watch.display import screen
-from fink_watch.utils import generate_logo
+from fink_watch.export import export_frames, series
+from fink_watch.faces import FaceCycle, make_faces
+from fink_watch.framebank import FrameBank
+from fink_watch.metrics import Metrics
+from fink_watch.geometry import MIN_PROGRESSION_DEG, MAX_PROGRESSION_DEG
+from fink_watch.utils import generate_logo, encoded_logo
+from fink_watch.worker import DisplayWorker
 from fink_watch.observatory import observatories
-from fink_watch.poll import poll_last_offset
+from fink_watch.poll import OffsetTracker, Poller
+from fink_watch.redraw import LOGO, ChangeDetector, visible_state
 
 logging.basicConfig(level=logging.DEBUG)
 
 
-def main():
-    """Launch the Fink watch"""
+def positive_float(value):
+    """Type of the arguments that must be strictly positive"""
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError("{} is not positive".format(value))
+    return number
+
+
+def parse_args(argv=None):
+    """Parse and check the command line
+
+    Parameters
+    ----------
+    argv: list of str
+        Arguments. Default is None, meaning `sys.argv`
+
+    Returns
+    -------
+    args: argparse.Namespace
+    """
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument(
         "--demo",
         action="store_true",
         help="If specified, display a fix image on the local computer instead of the LCD screen",
     )
+    parser.add_argument(
+        "--frame_bank",
+        action="store_true",
+        help="If specified, pre-render all the gauge states on disk (~/.cache/fink-watch) and re-use them",
+    )
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="If specified, drive an in-memory screen instead of the LCD screen, and log the SPI traffic at exit",
+    )
+    parser.add_argument(
+        "--animate",
+        action="store_true",
+        help="If specified, animate the gauge between two polls at `-fps` frames per second, instead of updating it every second (no periodic logo)",
+    )
     parser.add_argument(
         "-width",
         type=int,
@@ -55,30 +98,175 @@ def main():
     parser.add_argument(
         "-observatory",
         type=str,
-        default="ZTF",
-        help="Name of the observatory to set the local time for the `clock` option. Default is ZTF.",
+        nargs="+",
+        default=["ZTF"],
+        help="Name of the observatory to set the local time for the `clock` option, one for all the topics or one per topic. Default is ZTF.",
     )
     parser.add_argument(
         "-alert_per_deg",
         type=int,
-        default=1000,
-        help="Number of alerts per degree (for the alertmeter). Default is 1000",
+        nargs="+",
+        default=[1000],
+        help="Number of alerts per degree (for the alertmeter), one for all the topics or one per topic. Default is 1000",
+    )
+    parser.add_argument(
+        "-orientation",
+        type=int,
+        default=180,
+        help="Rotation of the screen in degree, counterclockwise: 0, 90, 180 or 270. Default is 180",
+    )
+    parser.add_argument(
+        "-framebuffer",
+        type=str,
+        default=None,
+        help="If specified, write to this Linux framebuffer (e.g. /dev/fb1, RGB565) instead of the Waveshare screen. A regular file of -width x -height can stand in for it.",
+    )
+    parser.add_argument(
+        "-metrics",
+        type=str,
+        default=None,
+        help="If specified, write the timings and counters to this file in the Prometheus text format (e.g. for the textfile collector of the node exporter). They are logged anyway.",
+    )
+    parser.add_argument(
+        "-metrics_every",
+        type=float,
+        default=60,
+        help="Time between two reports of the metrics, in seconds. Default is 60",
+    )
+    parser.add_argument(
+        "-poll_interval",
+        type=float,
+        default=1,
+        help="Time between two polls of Kafka while alerts flow, in seconds. Default is 1",
+    )
+    parser.add_argument(
+        "-max_poll_interval",
+        type=float,
+        default=300,
+        help="Longest time between two polls, reached by doubling the interval while no alert comes. Default is 300",
+    )
+    parser.add_argument(
+        "-max_retry_interval",
+        type=float,
+        default=None,
+        help="Longest time between two failed polls (cluster unreachable, topic not created yet), reached by doubling the interval after each failure. Default is -max_poll_interval",
+    )
+    parser.add_argument(
+        "-stale_after",
+        type=float,
+        default=10,
+        help="Age in seconds of the last successful poll after which the counter is marked as stale, on top of the current polling interval. Default is 10",
     )
     parser.add_argument(
         "-topic",
         type=str,
-        default="fink_ztf_{}".format(datetime.now().strftime("%Y%m%d")),
-        help="Topic name to read alerts. Default is fink_ztf_<YYYYMMDD>.",
+        nargs="+",
+        default=["fink_ztf_{}".format(datetime.now().strftime("%Y%m%d"))],
+        help="Topic name(s) to read alerts, polled over one connection. With several topics, their faces are shown in turn. Default is fink_ztf_<YYYYMMDD>.",
+    )
+    parser.add_argument(
+        "-cycle",
+        type=positive_float,
+        default=10,
+        help="Time each topic stays on screen, in seconds, with several topics. Default is 10",
+    )
+    parser.add_argument(
+        "--combine",
+        action="store_true",
+        help="If specified, show the sum of the alerts of all the topics on the face of the first one, instead of showing them in turn",
+    )
+
+    parser.add_argument(
+        "-export",
+        type=str,
+        default=None,
+        help="If specified, render a series of frames instead of displaying them: folder for PNG, or .gif or .rgb565 file",
+    )
+    parser.add_argument(
+        "-nframes",
+        type=int,
+        default=100,
+        help="Number of frames to export. Default is 100",
+    )
+    parser.add_argument(
+        "-start",
+        type=str,
+        default="20:00",
+        help="Time of the first exported frame, HH:MM. Default is 20:00",
+    )
+    parser.add_argument(
+        "-stop",
+        type=str,
+        default="06:00",
+        help="Time of the last exported frame, HH:MM. Default is 06:00",
+    )
+    parser.add_argument(
+        "-alerts_min",
+        type=int,
+        default=0,
+        help="Number of alerts in the first exported frame. Default is 0",
     )
+    parser.add_argument(
+        "-alerts_max",
+        type=int,
+        default=None,
+        help="Number of alerts in the last exported frame. Default is the full gauge",
+    )
+    parser.add_argument(
+        "-fps",
+        type=float,
+        default=10,
+        help="Frames per second, for `--animate` and the exported GIF. Default is 10",
+    )
+
+    args = parser.parse_args(argv)
 
-    args = parser.parse_args(None)
+    # One face per topic, see `faces.make_faces`
+    for name in ["observatory", "alert_per_deg"]:
+        if len(getattr(args, name)) not in [1, len(args.topic)]:
+            parser.error(
+                "-{}: give one for all the topics, or one per topic ({})".format(
+                    name, len(args.topic)
+                )
+            )
+
+    return args
+
+
+def main():
+    """Launch the Fink watch"""
+    args = parse_args()
 
     assert args.display in ["watch", "logo"], "`-display` should be among: watch, logo"
-    assert args.observatory in observatories.keys(), (
-        "{} not found in `fink_watch/observatory.py`. Please, edit the file and relaunch.".format(
-            args.observatory
+    for observatory in args.observatory:
+        assert observatory in observatories.keys(), (
+            "{} not found in `fink_watch/observatory.py`. Please, edit the file and relaunch.".format(
+                observatory
+            )
         )
-    )
+
+    # One face per topic. Export and demo use the first one.
+    faces = make_faces(args.topic, args.observatory, args.alert_per_deg)
+    first = faces[0]
+
+    if args.export is not None:
+        if args.alerts_max is None:
+            args.alerts_max = (
+                MAX_PROGRESSION_DEG - MIN_PROGRESSION_DEG
+            ) * first.alert_per_deg
+        frames = series(
+            args.start, args.stop, args.nframes, args.alerts_min, args.alerts_max
+        )
+        export_frames(
+            args.export,
+            frames,
+            width=args.width,
+            height=args.height,
+            observatory=first.observatory,
+            alert_per_deg=first.alert_per_deg,
+            fps=args.fps,
+        )
+        return
 
     if args.display == "logo":
         image = generate_logo(width=args.width, height=args.height)
@@ -86,8 +274,8 @@ def main():
         image = screen(
             width=args.width,
             height=args.height,
-            observatory=args.observatory,
-            alert_per_deg=args.alert_per_deg,
+            observatory=first.observatory,
+            alert_per_deg=first.alert_per_deg,
         )
 
     if args.demo:
@@ -95,13 +283,22 @@ def main():
         # for debugging
         image.show()
     else:
-        # Check input args
-        assert args.width == 240, "This program works only for 240x240 resolution"
-        assert args.height == 240, "This program works only for 240x240 resolution"
+        # In-memory screen, to run the whole loop without the hardware
+        backend = SimulatedBackend() if args.simulate else None
+
+        if args.framebuffer is not None:
+            from fink_watch.framebuffer import Framebuffer
+
+            disp = Framebuffer(args.framebuffer, args.width, args.height)
+        else:
+            from fink_watch.LCD_1inch28 import LCD_1inch28
 
-        from fink_watch.LCD_1inch28 import LCD_1inch28
+            disp = LCD_1inch28(orientation=args.orientation, backend=backend)
 
-        disp = LCD_1inch28()
+        # Check input args: the layout adapts, but not the screen
+        assert (args.width, args.height) == (disp.width, disp.height), (
+            "The screen resolution is {}x{}".format(disp.width, disp.height)
+        )
         disp.Init()
 
         # Clear display.
@@ -110,48 +307,132 @@ def main():
         # Set the backlight to 50
         disp.bl_DutyCycle(50)
 
+        # Gauge states, built once and re-used across restarts
+        banks = {}
+        if args.frame_bank:
+            for face in faces:
+                if face.observatory not in banks:
+                    banks[face.observatory] = FrameBank(
+                        disp.width, disp.height, face.observatory
+                    )
+
         # Logo intro
-        logo = generate_logo()
-        disp.ShowImage(logo)
+        logo = encoded_logo(disp.width, disp.height, cache_dir="pictures")
+        disp.ShowBuffer(logo)
         sleep(1)
 
         if args.display == "logo":
             disp.module_exit()
         elif args.display == "watch":
+            # From now on, the screen is only used by the worker, so
+            # that rendering and polling overlap with the SPI transfers
+            metrics = Metrics(args.metrics, every=args.metrics_every)
+            worker = DisplayWorker(disp, metrics=metrics).start()
+
+            # Frames identical to the one on screen are neither
+            # rendered nor sent
+            detector = ChangeDetector()
+
+            # Kafka polling, over one connection kept open, in the
+            # background: a slow or unreachable broker never blocks
+            # the screen, which shows the last value meanwhile
+            # TODO: proper yaml
+            cfg = {
+                "group.id": "fink-watch",
+                "bootstrap.servers": "134.158.74.95:24499",
+            }
+            tracker = OffsetTracker(cfg, args.topic)
+            poller = Poller(
+                tracker,
+                interval=args.poll_interval,
+                max_interval=args.max_poll_interval,
+                max_retry=args.max_retry_interval,
+                metrics=metrics,
+            ).start()
+
+            # Topics shown in turn, or combined on the first face. The
+            # face is selected once per frame, before `poll` and `show`
+            cycle = FaceCycle(faces, period=args.cycle, combine=args.combine)
+
+            def poll():
+                return cycle.count(poller.snapshot.totals)
+
+            def show(nalerts):
+                face = cycle.current()
+                now = datetime.now(tz=ZoneInfo(observatories[face.observatory]))
+                stale = poller.stale(args.stale_after)
+                rate = cycle.rate(poller.snapshot.rates)
+                state = visible_state(
+                    nalerts,
+                    face.observatory,
+                    face.alert_per_deg,
+                    now=now,
+                    stale=stale,
+                    rate=rate,
+                )
+                metrics.tick()
+                if not detector.changed(state):
+                    metrics.count("frames_skipped")
+                    return
+
+                # Generate image
+                if banks:
+                    with metrics.time("render"):
+                        frame = banks[face.observatory].render(
+                            nalerts,
+                            alert_per_deg=face.alert_per_deg,
+                            now=now,
+                            stale=stale,
+                            rate=rate,
+                        )
+                    worker.show_buffer(frame)
+                else:
+                    with metrics.time("render"):
+                        image = screen(
+                            width=disp.width,
+                            height=disp.height,
+                            progression=nalerts,
+                            observatory=face.observatory,
+                            alert_per_deg=face.alert_per_deg,
+                            now=now,
+                            stale=stale,
+                            rate=rate,
+                        )
+                    worker.show_image(image)
+
             # Counter or Clock
             try:
+                if args.animate:
+                    animate(
+                        show, poll, fps=args.fps, switch=cycle.select, worker=worker
+                    )
+
                 counter = 0
-                while True:
+                while not args.animate:
                     # Show the logo every 60 seconds
-                    if counter % 60 == 0:
-                        disp.ShowImage(logo)
+                    if counter % 60 == 0 and detector.changed(LOGO):
+                        worker.show_buffer(logo, diff=False)
                         sleep(2)
 
-                    # Kafka polling
-                    # TODO: proper yaml
-                    cfg = {
-                        "group.id": "fink-watch",
-                        "bootstrap.servers": "134.158.74.95:24499",
-                    }
-                    nalerts = poll_last_offset(cfg, topic=args.topic)
-
-                    # Generate image
-                    image = screen(
-                        progression=nalerts,
-                        observatory=args.observatory,
-                        alert_per_deg=args.alert_per_deg,
-                    )
-                    image = image.rotate(180)
-                    disp.ShowImage(image)
+                    cycle.select()
+                    show(poll())
 
                     # TODO: 1 second is probably overkill...
                     sleep(1)
                     counter += 1
+                worker.stop()
+                poller.stop(timeout=2)
                 disp.module_exit()
             except IOError as e:
                 logging.info(e)
             except KeyboardInterrupt:
+                worker.stop()
+                poller.stop(timeout=2)
                 disp.module_exit()
+                detector.report()
+                metrics.report()
+                if backend is not None:
+                    logging.info("Simulated screen: {}".format(backend.stats()))
                 logging.info("quit:")
                 exit()
 
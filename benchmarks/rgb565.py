@@ -0,0 +1,90 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Microbenchmark of the RGB565 conversion
+
+Run from the root of the repository: python -m benchmarks.rgb565
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+
+from fink_watch.display import screen
+from fink_watch.rgb565 import RGB565Encoder
+
+
+def legacy_rgb565(image, width, height):
+    """Conversion used by `LCD_1inch28.ShowImage` before `RGB565Encoder`"""
+    img = np.asarray(image)
+    pix = np.zeros((width, height, 2), dtype=np.uint8)
+    pix[..., [0]] = np.add(
+        np.bitwise_and(img[..., [0]], 0xF8),
+        np.right_shift(img[..., [1]], 5),
+    )
+    pix[..., [1]] = np.add(
+        np.bitwise_and(np.left_shift(img[..., [1]], 3), 0xE0),
+        np.right_shift(img[..., [2]], 3),
+    )
+    return pix.flatten().tolist()
+
+
+def main():
+    """Compare the legacy conversion with `RGB565Encoder`"""
+    parser = argparse.ArgumentParser(
+        description="Microbenchmark of the RGB565 conversion"
+    )
+    parser.add_argument(
+        "-number",
+        type=int,
+        default=200,
+        help="Number of conversions per measurement. Default is 200",
+    )
+    args = parser.parse_args(None)
+
+    width, height = 240, 240
+    image = screen(width=width, height=height)
+    encoder = RGB565Encoder(width, height)
+
+    assert bytes(encoder.encode(image)) == bytes(legacy_rgb565(image, width, height))
+
+    inputs = {
+        "RGB": image,
+        "RGBA": image.convert("RGBA"),
+        "P": image.convert("P"),
+    }
+    for mode, img in inputs.items():
+        legacy = min(
+            timeit.repeat(
+                lambda: legacy_rgb565(img.convert("RGB"), width, height),
+                number=args.number,
+                repeat=3,
+            )
+        )
+        new = min(
+            timeit.repeat(lambda: encoder.encode(img), number=args.number, repeat=3)
+        )
+        print(
+            "{:<5} legacy: {:7.3f} ms/frame  encoder: {:7.3f} ms/frame  x{:.1f}".format(
+                mode,
+                legacy / args.number * 1e3,
+                new / args.number * 1e3,
+                legacy / new,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
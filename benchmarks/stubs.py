@@ -0,0 +1,76 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Stand-in for Kafka, to benchmark on any machine
+
+The screen is simulated with `fink_watch.backends.SimulatedBackend`.
+"""
+
+import concurrent.futures
+import types
+
+
+class KafkaException(Exception):
+    pass
+
+
+class KafkaError:
+    _TIMED_OUT = -185
+
+    def __init__(self, code, reason=None):
+        self.code = code
+        self.reason = reason
+
+
+class TopicPartition:
+    def __init__(self, topic, partition):
+        self.topic = topic
+        self.partition = partition
+
+
+class OffsetSpec:
+    @staticmethod
+    def latest():
+        return OffsetSpec()
+
+
+class AdminClient:
+    """Admin client answering from memory, with `kafka.offsets`"""
+
+    def __init__(self, config):
+        self.config = config
+
+    def list_topics(self, topic=None, timeout=-1):
+        partitions = dict.fromkeys(range(len(kafka.offsets)))
+        metadata = types.SimpleNamespace(error=None, partitions=partitions)
+        return types.SimpleNamespace(topics={topic: metadata})
+
+    def list_offsets(self, topic_partition_offsets, request_timeout=None):
+        futures = {}
+        for tp in topic_partition_offsets:
+            futures[tp] = concurrent.futures.Future()
+            futures[tp].set_result(
+                types.SimpleNamespace(offset=kafka.offsets[tp.partition])
+            )
+        return futures
+
+
+# Replacement for the `confluent_kafka` module
+kafka = types.SimpleNamespace(
+    TopicPartition=TopicPartition,
+    KafkaException=KafkaException,
+    KafkaError=KafkaError,
+    admin=types.SimpleNamespace(AdminClient=AdminClient, OffsetSpec=OffsetSpec),
+    offsets=[120000] * 10,
+)
@@ -0,0 +1,306 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks of the rendering and of the transport, with baselines
+
+Run from the root of the repository:
+
+    # Record the baseline of this machine
+    python -m benchmarks.suite --update
+
+    # Compare with it, exit with 1 if a case regressed
+    python -m benchmarks.suite
+
+The screen is simulated (`fink_watch.backends.SimulatedBackend`), and
+Kafka replaced by the stand-in of `benchmarks.stubs`, so it runs on
+any Linux machine. Baselines depend on the machine, so none is
+committed: record one before the change to evaluate. Without a
+baseline, no regression is checked, which is reported, and is an error
+with `--require_baseline` (e.g. in CI).
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import logging
+import os
+import resource
+import sys
+import timeit
+import tracemalloc
+
+from benchmarks import stubs
+from fink_watch import poll
+from fink_watch.backends import SimulatedBackend
+from fink_watch.display import screen
+from fink_watch.LCD_1inch28 import LCD_1inch28
+from fink_watch.rgb565 import RGB565Encoder
+from fink_watch.utils import generate_logo
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+RESOLUTIONS = [240, 360, 480]
+PROGRESSIONS = [0, 120000, 270000]
+
+# Fixed time, so that every run draws the same clock
+NOW = datetime.datetime(2025, 1, 1, 12, 34)
+
+# Metrics compared with the baseline, and the absolute difference
+# below which a change is considered as noise. alloc_kb comes from
+# tracemalloc: Python objects and NumPy arrays only, not the buffers
+# allocated in C by PIL (images) or other extensions.
+METRICS = {"ms_per_frame": 0.05, "alloc_kb": 4.0}
+
+
+def cases():
+    """Benchmarked functions
+
+    Returns
+    -------
+    out: list of tuple
+        (name, function without arguments)
+    """
+    out = []
+    for size in RESOLUTIONS:
+        for progression in PROGRESSIONS:
+            out.append((
+                "screen[{}x{},{}]".format(size, size, progression),
+                lambda size=size, progression=progression: screen(
+                    width=size, height=size, progression=progression, now=NOW
+                ),
+            ))
+
+        out.append((
+            "generate_logo[{}x{}]".format(size, size),
+            lambda size=size: generate_logo(width=size, height=size),
+        ))
+
+        image = screen(width=size, height=size, now=NOW)
+        encoder = RGB565Encoder(size, size)
+        out.append((
+            "rgb565[{}x{}]".format(size, size),
+            lambda image=image, encoder=encoder: encoder.encode(image),
+        ))
+
+    # Full frames through the driver, and updates of the clock only
+    disp = LCD_1inch28(backend=SimulatedBackend(decode=False))
+    frames = [
+        screen(progression=120000, now=NOW),
+        screen(progression=120000, now=NOW + datetime.timedelta(minutes=1)),
+    ]
+    out.append(("ShowImage[240x240]", lambda: disp.ShowImage(frames[0])))
+
+    alternate = itertools.cycle(frames)
+    out.append(("ShowImageDiff[240x240]", lambda: disp.ShowImageDiff(next(alternate))))
+
+    for npartitions in [1, 10, 100]:
+        offsets = [120000] * npartitions
+        out.append((
+            "poll_last_offset[{} partitions]".format(npartitions),
+            lambda offsets=offsets: poll_with(offsets),
+        ))
+        tracker = tracker_with(offsets)
+        out.append((
+            "OffsetTracker.poll[{} partitions]".format(npartitions),
+            lambda offsets=offsets, tracker=tracker: tracker_poll(tracker, offsets),
+        ))
+
+    return out
+
+
+def poll_with(offsets):
+    """`poll_last_offset` on the local stand-in for Kafka"""
+    poll.confluent_kafka = stubs.kafka
+    stubs.kafka.offsets = offsets
+    return poll.poll_last_offset({"group.id": "benchmark"}, "fink_alerts")
+
+
+def tracker_with(offsets):
+    """`OffsetTracker` on the local stand-in for Kafka"""
+    poll.confluent_kafka = stubs.kafka
+    stubs.kafka.offsets = offsets
+    return poll.OffsetTracker({"group.id": "benchmark"}, "fink_alerts")
+
+
+def tracker_poll(tracker, offsets):
+    """One poll of a long-lived `OffsetTracker`"""
+    stubs.kafka.offsets = offsets
+    return tracker.poll()
+
+
+def measure(function, number, repeat=5):
+    """Time and allocations of a function
+
+    Parameters
+    ----------
+    function: callable
+        Function without arguments
+    number: int
+        Number of calls per measurement
+    repeat: int
+        Number of measurements, the best one is kept. Default is 5
+
+    Returns
+    -------
+    out: dict
+        ms_per_frame, and alloc_kb, the peak of the memory allocated
+        during one call, as traced by tracemalloc (Python-level
+        allocations only, see `METRICS`)
+    """
+    # Warm up the caches
+    function()
+
+    best = min(timeit.repeat(function, number=number, repeat=repeat))
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start, _ = tracemalloc.get_traced_memory()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ms_per_frame": round(best / number * 1e3, 4),
+        "alloc_kb": round((peak - start) / 1024, 1),
+    }
+
+
+def regressions(results, baseline, threshold):
+    """Cases slower or allocating more than the baseline
+
+    Parameters
+    ----------
+    results: dict
+        Measurements, per case
+    baseline: dict
+        Reference measurements, per case
+    threshold: float
+        Tolerated relative increase, e.g. 0.2 for 20%
+
+    Returns
+    -------
+    out: list of str
+        Description of each regression
+    """
+    out = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric, noise in METRICS.items():
+            new, ref = result[metric], baseline[name][metric]
+            if new > ref * (1 + threshold) and new - ref > noise:
+                out.append(
+                    "{}: {} {} -> {} (+{:.0f}%)".format(
+                        name, metric, ref, new, (new / ref - 1) * 100 if ref else 100
+                    )
+                )
+    return out
+
+
+def main():
+    """Run the benchmarks, and compare them with the baseline"""
+    parser = argparse.ArgumentParser(
+        description="Benchmarks of the rendering and of the transport"
+    )
+    parser.add_argument(
+        "-number",
+        type=int,
+        default=50,
+        help="Number of calls per measurement. Default is 50",
+    )
+    parser.add_argument(
+        "-baseline",
+        type=str,
+        default=BASELINE,
+        help="JSON file with the reference results. Default is benchmarks/baseline.json",
+    )
+    parser.add_argument(
+        "-threshold",
+        type=float,
+        default=0.2,
+        help="Tolerated relative increase before failing. Default is 0.2",
+    )
+    parser.add_argument(
+        "-select",
+        type=str,
+        default="",
+        help="Only run the cases whose name contains this string",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="If specified, write the results as the new baseline",
+    )
+    parser.add_argument(
+        "--require_baseline",
+        action="store_true",
+        help="If specified, exit with 1 when there is no baseline to compare with, instead of only reporting it",
+    )
+    args = parser.parse_args(None)
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {}
+    for name, function in cases():
+        if args.select not in name:
+            continue
+        results[name] = measure(function, args.number)
+        print(
+            "{:<36} {:9.3f} ms/frame {:9.1f} KB/frame".format(
+                name, results[name]["ms_per_frame"], results[name]["alloc_kb"]
+            )
+        )
+
+    # Resident memory only grows: it is not per case, nor compared
+    print(
+        "Peak RSS of the whole run: {:.1f} MB".format(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        )
+    )
+
+    if args.update:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print("Baseline written in {}".format(args.baseline))
+        return
+
+    if not os.path.exists(args.baseline):
+        print(
+            "No baseline in {}: regressions NOT checked. Record one with --update".format(
+                args.baseline
+            ),
+            file=sys.stderr,
+        )
+        if args.require_baseline:
+            sys.exit(1)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    failures = regressions(results, baseline, args.threshold)
+    for failure in failures:
+        print("REGRESSION {}".format(failure))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -26,22 +26,134 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import struct
 import time
+import numpy as np
 from fink_watch import lcdconfig
+from fink_watch.rgb565 import RGB565Encoder
+
+# Memory access control (0x36) for each orientation, in degree
+# counterclockwise as for `Image.rotate`. The BGR bit (0x08) is always
+# set, and MY (0x80), MX (0x40) and MV (0x20) rotate the addressing.
+MADCTL = {0: 0x08, 90: 0xA8, 180: 0xC8, 270: 0x68}
+
+# Initialization of the GC9A01, from the Waveshare examples: command,
+# parameters and delay after it, in ms. The parameter of the memory
+# access control (0x36) depends on the orientation, see `MADCTL`.
+INIT_SEQUENCE = [
+    (0xEF, b"", 0),
+    (0xEB, bytes([0x14]), 0),
+    (0xFE, b"", 0),
+    (0xEF, b"", 0),
+    (0xEB, bytes([0x14]), 0),
+    (0x84, bytes([0x40]), 0),
+    (0x85, bytes([0xFF]), 0),
+    (0x86, bytes([0xFF]), 0),
+    (0x87, bytes([0xFF]), 0),
+    (0x88, bytes([0x0A]), 0),
+    (0x89, bytes([0x21]), 0),
+    (0x8A, bytes([0x00]), 0),
+    (0x8B, bytes([0x80]), 0),
+    (0x8C, bytes([0x01]), 0),
+    (0x8D, bytes([0x01]), 0),
+    (0x8E, bytes([0xFF]), 0),
+    (0x8F, bytes([0xFF]), 0),
+    (0xB6, bytes([0x00, 0x20]), 0),
+    (0x36, None, 0),
+    (0x3A, bytes([0x05]), 0),
+    (0x90, bytes([0x08, 0x08, 0x08, 0x08]), 0),
+    (0xBD, bytes([0x06]), 0),
+    (0xBC, bytes([0x00]), 0),
+    (0xFF, bytes([0x60, 0x01, 0x04]), 0),
+    (0xC3, bytes([0x13]), 0),
+    (0xC4, bytes([0x13]), 0),
+    (0xC9, bytes([0x22]), 0),
+    (0xBE, bytes([0x11]), 0),
+    (0xE1, bytes([0x10, 0x0E]), 0),
+    (0xDF, bytes([0x21, 0x0C, 0x02]), 0),
+    (0xF0, bytes([0x45, 0x09, 0x08, 0x08, 0x26, 0x2A]), 0),
+    (0xF1, bytes([0x43, 0x70, 0x72, 0x36, 0x37, 0x6F]), 0),
+    (0xF2, bytes([0x45, 0x09, 0x08, 0x08, 0x26, 0x2A]), 0),
+    (0xF3, bytes([0x43, 0x70, 0x72, 0x36, 0x37, 0x6F]), 0),
+    (0xED, bytes([0x1B, 0x0B]), 0),
+    (0xAE, bytes([0x77]), 0),
+    (0xCD, bytes([0x63]), 0),
+    (0x70, bytes([0x07, 0x07, 0x04, 0x0E, 0x0F, 0x09, 0x07, 0x08, 0x03]), 0),
+    (0xE8, bytes([0x34]), 0),
+    (
+        0x62,
+        bytes([0x18, 0x0D, 0x71, 0xED, 0x70, 0x70, 0x18, 0x0F, 0x71, 0xEF, 0x70, 0x70]),
+        0,
+    ),
+    (
+        0x63,
+        bytes([0x18, 0x11, 0x71, 0xF1, 0x70, 0x70, 0x18, 0x13, 0x71, 0xF3, 0x70, 0x70]),
+        0,
+    ),
+    (0x64, bytes([0x28, 0x29, 0xF1, 0x01, 0xF1, 0x00, 0x07]), 0),
+    (0x66, bytes([0x3C, 0x00, 0xCD, 0x67, 0x45, 0x45, 0x10, 0x00, 0x00, 0x00]), 0),
+    (0x67, bytes([0x00, 0x3C, 0x00, 0x00, 0x00, 0x01, 0x54, 0x10, 0x32, 0x98]), 0),
+    (0x74, bytes([0x10, 0x85, 0x80, 0x00, 0x00, 0x4E, 0x00]), 0),
+    (0x98, bytes([0x3E, 0x07]), 0),
+    (0x35, b"", 0),
+    (0x21, b"", 0),
+    (0x11, b"", 120),
+    (0x29, b"", 20),
+]
 
 
 class LCD_1inch28(lcdconfig.RaspberryPi):
     width = 240
     height = 240
 
+    # RGB565 content of the screen, if known
+    _last_frame = None
+
+    # Level of the DC pin, if known: False for commands, True for data
+    _dc = None
+
+    def __init__(self, *args, orientation=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        if orientation not in MADCTL:
+            raise ValueError("orientation must be among {}".format(list(MADCTL.keys())))
+        self.orientation = orientation
+        self.encoder = RGB565Encoder(self.width, self.height)
+
+    def set_dc(self, value):
+        """Drive the data/command pin, only if its level changes
+
+        Parameters
+        ----------
+        value: bool
+            False for commands, True for data
+        """
+        if self._dc is not value:
+            self.digital_write(self.DC_PIN, value)
+            self._dc = value
+
     def command(self, cmd):
-        self.digital_write(self.DC_PIN, False)
+        self.set_dc(False)
         self.spi_writebyte([cmd])
 
     def data(self, val):
-        self.digital_write(self.DC_PIN, True)
+        self.set_dc(True)
         self.spi_writebyte([val])
 
+    def write_register(self, cmd, params=b""):
+        """Send a command, and its parameters in one burst
+
+        Parameters
+        ----------
+        cmd: int
+            Command byte
+        params: bytes
+            Parameters of the command. Default is none
+        """
+        self.command(cmd)
+        if params:
+            self.set_dc(True)
+            self.spi_writebuffer(params)
+
     def reset(self):
         """Reset the display"""
         self.digital_write(self.RST_PIN, True)
@@ -55,263 +167,139 @@ class LCD_1inch28(lcdconfig.RaspberryPi):
         """Initialize dispaly"""
         self.module_init()
         self.reset()
+        self._last_frame = None
 
-        self.command(0xEF)
-        self.command(0xEB)
-        self.data(0x14)
-
-        self.command(0xFE)
-        self.command(0xEF)
+        for cmd, params, delay in INIT_SEQUENCE:
+            if cmd == 0x36:
+                params = bytes([MADCTL[self.orientation]])
+            self.write_register(cmd, params)
+            if delay:
+                self.delay_ms(delay)
 
-        self.command(0xEB)
-        self.data(0x14)
+    def SetOrientation(self, orientation):
+        """Rotate the content of the screen in hardware
 
-        self.command(0x84)
-        self.data(0x40)
-
-        self.command(0x85)
-        self.data(0xFF)
-
-        self.command(0x86)
-        self.data(0xFF)
+        Parameters
+        ----------
+        orientation: int
+            Rotation in degree, counterclockwise: 0, 90, 180 or 270
+        """
+        if orientation not in MADCTL:
+            raise ValueError("orientation must be among {}".format(list(MADCTL.keys())))
+        self.orientation = orientation
+        self.write_register(0x36, bytes([MADCTL[orientation]]))
+        # Already displayed pixels are not moved
+        self._last_frame = None
 
-        self.command(0x87)
-        self.data(0xFF)
+    def SetWindows(self, Xstart, Ystart, Xend, Yend):
+        """Set buffer to value of Python Imaging Library image"""
+        # set the X coordinates, high octet first
+        self.write_register(0x2A, struct.pack(">HH", Xstart, Xend - 1))
 
-        self.command(0x88)
-        self.data(0x0A)
+        # set the Y coordinates
+        self.write_register(0x2B, struct.pack(">HH", Ystart, Yend - 1))
 
-        self.command(0x89)
-        self.data(0x21)
+        self.command(0x2C)
 
-        self.command(0x8A)
-        self.data(0x00)
+    def ShowImage(self, Image):
+        """Write display buffer to physical display
 
-        self.command(0x8B)
-        self.data(0x80)
+        Parameters
+        ----------
+        Image: PILL.Image
+            Image to display
+        """
+        pix = self.rgb565(Image)
+        self.SetWindows(0, 0, self.width, self.height)
+        self.set_dc(True)
+        self.write_pixels(pix)
+        self.remember(pix)
 
-        self.command(0x8C)
-        self.data(0x01)
+    def ShowBuffer(self, buffer):
+        """Write an already encoded frame to physical display
 
-        self.command(0x8D)
-        self.data(0x01)
+        Parameters
+        ----------
+        buffer: bytes-like
+            Full RGB565 frame, high byte first
+        """
+        pix = self.np.frombuffer(buffer, dtype=self.np.uint16)
+        if pix.size != self.width * self.height:
+            raise ValueError(
+                "Buffer must be same dimensions as display \
+                ({0}x{1}).".format(self.width, self.height)
+            )
+        self.SetWindows(0, 0, self.width, self.height)
+        self.set_dc(True)
+        self.spi_writebuffer(buffer)
+        self.remember(pix.reshape(self.height, self.width))
 
-        self.command(0x8E)
-        self.data(0xFF)
-
-        self.command(0x8F)
-        self.data(0xFF)
+    def ShowImageDiff(self, Image, gap=8):
+        """Write only the regions that changed since the last frame
 
-        self.command(0xB6)
-        self.data(0x00)
-        self.data(0x20)
+        The changed pixels are grouped into rectangles, and each of
+        them is sent in its own window. Falls back to `ShowImage` if
+        the content of the screen is unknown.
 
-        self.command(0x36)
-        self.data(0x08)
-
-        self.command(0x3A)
-        self.data(0x05)
-
-        self.command(0x90)
-        self.data(0x08)
-        self.data(0x08)
-        self.data(0x08)
-        self.data(0x08)
-
-        self.command(0xBD)
-        self.data(0x06)
-
-        self.command(0xBC)
-        self.data(0x00)
-
-        self.command(0xFF)
-        self.data(0x60)
-        self.data(0x01)
-        self.data(0x04)
-
-        self.command(0xC3)
-        self.data(0x13)
-        self.command(0xC4)
-        self.data(0x13)
-
-        self.command(0xC9)
-        self.data(0x22)
-
-        self.command(0xBE)
-        self.data(0x11)
-
-        self.command(0xE1)
-        self.data(0x10)
-        self.data(0x0E)
-
-        self.command(0xDF)
-        self.data(0x21)
-        self.data(0x0C)
-        self.data(0x02)
-
-        self.command(0xF0)
-        self.data(0x45)
-        self.data(0x09)
-        self.data(0x08)
-        self.data(0x08)
-        self.data(0x26)
-        self.data(0x2A)
-
-        self.command(0xF1)
-        self.data(0x43)
-        self.data(0x70)
-        self.data(0x72)
-        self.data(0x36)
-        self.data(0x37)
-        self.data(0x6F)
-
-        self.command(0xF2)
-        self.data(0x45)
-        self.data(0x09)
-        self.data(0x08)
-        self.data(0x08)
-        self.data(0x26)
-        self.data(0x2A)
-
-        self.command(0xF3)
-        self.data(0x43)
-        self.data(0x70)
-        self.data(0x72)
-        self.data(0x36)
-        self.data(0x37)
-        self.data(0x6F)
-
-        self.command(0xED)
-        self.data(0x1B)
-        self.data(0x0B)
-
-        self.command(0xAE)
-        self.data(0x77)
-
-        self.command(0xCD)
-        self.data(0x63)
-
-        self.command(0x70)
-        self.data(0x07)
-        self.data(0x07)
-        self.data(0x04)
-        self.data(0x0E)
-        self.data(0x0F)
-        self.data(0x09)
-        self.data(0x07)
-        self.data(0x08)
-        self.data(0x03)
-
-        self.command(0xE8)
-        self.data(0x34)
-
-        self.command(0x62)
-        self.data(0x18)
-        self.data(0x0D)
-        self.data(0x71)
-        self.data(0xED)
-        self.data(0x70)
-        self.data(0x70)
-        self.data(0x18)
-        self.data(0x0F)
-        self.data(0x71)
-        self.data(0xEF)
-        self.data(0x70)
-        self.data(0x70)
-
-        self.command(0x63)
-        self.data(0x18)
-        self.data(0x11)
-        self.data(0x71)
-        self.data(0xF1)
-        self.data(0x70)
-        self.data(0x70)
-        self.data(0x18)
-        self.data(0x13)
-        self.data(0x71)
-        self.data(0xF3)
-        self.data(0x70)
-        self.data(0x70)
-
-        self.command(0x64)
-        self.data(0x28)
-        self.data(0x29)
-        self.data(0xF1)
-        self.data(0x01)
-        self.data(0xF1)
-        self.data(0x00)
-        self.data(0x07)
-
-        self.command(0x66)
-        self.data(0x3C)
-        self.data(0x00)
-        self.data(0xCD)
-        self.data(0x67)
-        self.data(0x45)
-        self.data(0x45)
-        self.data(0x10)
-        self.data(0x00)
-        self.data(0x00)
-        self.data(0x00)
-
-        self.command(0x67)
-        self.data(0x00)
-        self.data(0x3C)
-        self.data(0x00)
-        self.data(0x00)
-        self.data(0x00)
-        self.data(0x01)
-        self.data(0x54)
-        self.data(0x10)
-        self.data(0x32)
-        self.data(0x98)
-
-        self.command(0x74)
-        self.data(0x10)
-        self.data(0x85)
-        self.data(0x80)
-        self.data(0x00)
-        self.data(0x00)
-        self.data(0x4E)
-        self.data(0x00)
-
-        self.command(0x98)
-        self.data(0x3E)
-        self.data(0x07)
-
-        self.command(0x35)
-        self.command(0x21)
-
-        self.command(0x11)
-        time.sleep(0.12)
-        self.command(0x29)
-        time.sleep(0.02)
+        Parameters
+        ----------
+        Image: PILL.Image
+            Image to display
+        gap: int
+            Changed regions closer than `gap` pixels are merged into
+            one window. Default is 8.
+
+        Returns
+        -------
+        boxes: list of tuple
+            Windows (Xstart, Ystart, Xend, Yend) that have been sent
+        """
+        return self.ShowBufferDiff(self.rgb565(Image), gap=gap)
 
-    def SetWindows(self, Xstart, Ystart, Xend, Yend):
-        """Set buffer to value of Python Imaging Library image"""
-        # set the X coordinates
-        self.command(0x2A)
-        self.data(0x00)  # Set the horizontal starting point to the high octet
-        self.data(Xstart)  # Set the horizontal starting point to the low octet
-        self.data(0x00)  # Set the horizontal end to the high octet
-        self.data(Xend - 1)  # Set the horizontal end to the low octet
+    def ShowBufferDiff(self, buffer, gap=8):
+        """Write only the regions of an encoded frame that changed
 
-        # set the Y coordinates
-        self.command(0x2B)
-        self.data(0x00)
-        self.data(Ystart)
-        self.data(0x00)
-        self.data(Yend - 1)
+        Parameters
+        ----------
+        buffer: bytes-like
+            Full RGB565 frame, high byte first
+        gap: int
+            See `ShowImageDiff`. Default is 8.
+
+        Returns
+        -------
+        boxes: list of tuple
+            Windows (Xstart, Ystart, Xend, Yend) that have been sent
+        """
+        if self._last_frame is None:
+            self.ShowBuffer(buffer)
+            return [(0, 0, self.width, self.height)]
 
-        self.command(0x2C)
+        pix = self.np.frombuffer(buffer, dtype=self.np.uint16).reshape(
+            self.height, self.width
+        )
+        boxes = dirty_rectangles(pix != self._last_frame, gap=gap)
+        for Xstart, Ystart, Xend, Yend in boxes:
+            self.SetWindows(Xstart, Ystart, Xend, Yend)
+            self.set_dc(True)
+            self.write_pixels(pix[Ystart:Yend, Xstart:Xend])
+        self.remember(pix)
+        return boxes
 
-    def ShowImage(self, Image):
-        """Write display buffer to physical display
+    def rgb565(self, Image):
+        """Convert an image to the RGB565 format of the display
 
         Parameters
         ----------
         Image: PILL.Image
-            Image to display
+            Image to convert
+
+        Returns
+        -------
+        pix: np.array
+            uint16 array of shape (height, width), high byte first in
+            memory. It is the buffer of the encoder, re-used by the next
+            conversion.
         """
         imwidth, imheight = Image.size
         if imwidth != self.width or imheight != self.height:
@@ -319,26 +307,75 @@ class LCD_1inch28(lcdconfig.RaspberryPi):
                 "Image must be same dimensions as display \
                 ({0}x{1}).".format(self.width, self.height)
             )
-        img = self.np.asarray(Image)
-        pix = self.np.zeros((self.width, self.height, 2), dtype=self.np.uint8)
-        pix[..., [0]] = self.np.add(
-            self.np.bitwise_and(img[..., [0]], 0xF8),
-            self.np.right_shift(img[..., [1]], 5),
-        )
-        pix[..., [1]] = self.np.add(
-            self.np.bitwise_and(self.np.left_shift(img[..., [1]], 3), 0xE0),
-            self.np.right_shift(img[..., [2]], 3),
-        )
-        pix = pix.flatten().tolist()
-        self.SetWindows(0, 0, self.width, self.height)
-        self.digital_write(self.DC_PIN, True)
-        for i in range(0, len(pix), 4096):
-            self.spi_writebyte(pix[i : i + 4096])
+        self.encoder.encode(Image)
+        return self.encoder.array
+
+    def remember(self, pix):
+        """Keep a copy of the content of the screen
+
+        Parameters
+        ----------
+        pix: np.array
+            RGB565 pixels of the full screen
+        """
+        if self._last_frame is None:
+            self._last_frame = pix.copy()
+        else:
+            self.np.copyto(self._last_frame, pix)
+
+    def write_pixels(self, pix):
+        """Send pixels to the current window
+
+        Parameters
+        ----------
+        pix: np.array
+            RGB565 pixels, as returned by `rgb565`
+        """
+        self.spi_writebuffer(self.np.ascontiguousarray(pix))
 
     def clear(self):
         """Clear contents of image buffer"""
-        _buffer = [0xFF] * (self.width * self.height * 2)
+        _buffer = b"\xff" * (self.width * self.height * 2)
         self.SetWindows(0, 0, self.width, self.height)
-        self.digital_write(self.DC_PIN, True)
-        for i in range(0, len(_buffer), 4096):
-            self.spi_writebyte(_buffer[i : i + 4096])
+        self.set_dc(True)
+        self.spi_writebuffer(_buffer)
+        self.remember(
+            self.np.full((self.height, self.width), 0xFFFF, dtype=self.np.uint16)
+        )
+
+
+def _runs(flags, gap):
+    """Intervals [start, end) of True values, merged if closer than gap"""
+    index = np.flatnonzero(flags)
+    if index.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(index) > gap)
+    starts = np.concatenate(([index[0]], index[breaks + 1]))
+    ends = np.concatenate((index[breaks], [index[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def dirty_rectangles(changed, gap=8):
+    """Bounding boxes of the changed pixels
+
+    Rows are first grouped into bands of changed lines, and each band
+    is then split into boxes along the columns.
+
+    Parameters
+    ----------
+    changed: np.array of bool
+        Array of shape (height, width), True where the pixel changed
+    gap: int
+        Regions closer than `gap` pixels are merged. Default is 8.
+
+    Returns
+    -------
+    boxes: list of tuple
+        Boxes (Xstart, Ystart, Xend, Yend), with exclusive ends
+    """
+    boxes = []
+    for Ystart, Yend in _runs(changed.any(axis=1), gap):
+        band = changed[Ystart:Yend].any(axis=0)
+        for Xstart, Xend in _runs(band, gap):
+            boxes.append((Xstart, Ystart, Xend, Yend))
+    return boxes
@@ -0,0 +1,269 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Smooth transitions of the gauge between two polls"""
+
+import logging
+import time
+from collections import namedtuple
+
+FrameStats = namedtuple(
+    "FrameStats",
+    [
+        "target_fps",
+        "fps",
+        "rendered",
+        "dropped",
+        "ms_per_frame",
+        "load",
+        "shown_fps",
+        "replaced",
+    ],
+)
+
+
+class Transition:
+    """Number of alerts, eased from the previous poll to the last one
+
+    Parameters
+    ----------
+    value: float
+        Initial number of alerts. Default is 0
+    duration: float
+        Duration of a transition, in seconds. Default is 1
+    """
+
+    def __init__(self, value=0, duration=1.0):
+        self.duration = duration
+        self.start = value
+        self.target = value
+        self.t0 = 0.0
+
+    def update(self, target, now):
+        """Start a transition from the current value to a new one
+
+        Parameters
+        ----------
+        target: int
+            New number of alerts
+        now: float
+            Current time, from `time.monotonic`
+        """
+        self.start = self.value(now)
+        self.target = target
+        self.t0 = now
+
+    def value(self, now):
+        """Number of alerts to display
+
+        Parameters
+        ----------
+        now: float
+            Current time, from `time.monotonic`
+
+        Returns
+        -------
+        out: float
+        """
+        fraction = min(max((now - self.t0) / self.duration, 0.0), 1.0)
+        # Smoothstep: starts and ends with a null speed
+        ease = fraction * fraction * (3 - 2 * fraction)
+        return self.start + (self.target - self.start) * ease
+
+
+class FrameScheduler:
+    """Pace frames at a given rate, dropping the ones out of budget
+
+    Frames start on a fixed grid of period 1/fps. When rendering and
+    sending a frame takes longer than the period, the slots already
+    passed are dropped, and the next frame shows the state at its own
+    start time, so that late frames are merged rather than queued.
+
+    When frames are sent by a `worker.DisplayWorker`, the budget only
+    covers rendering and submitting them: the statistics then also
+    give the frames actually sent to the screen, and the ones replaced
+    by a newer frame before being sent.
+
+    Parameters
+    ----------
+    fps: float
+        Target number of frames per second
+    worker: DisplayWorker
+        Worker sending the frames, if any. Default is None
+    """
+
+    def __init__(self, fps, worker=None):
+        self.fps = fps
+        self.period = 1.0 / fps
+        self.worker = worker
+        self._deadline = None
+        self.reset()
+
+    def _worker_counts(self):
+        if self.worker is None:
+            return 0, 0
+        return self.worker.shown, self.worker.dropped
+
+    def reset(self):
+        """Start a new window for the statistics"""
+        self.rendered = 0
+        self.dropped = 0
+        self.busy = 0.0
+        self._window = time.monotonic()
+        self._shown, self._replaced = self._worker_counts()
+
+    def start_frame(self):
+        """Wait for the next slot
+
+        Returns
+        -------
+        out: float
+            Start time of the frame, from `time.monotonic`
+        """
+        now = time.monotonic()
+        if self._deadline is None:
+            self._deadline = now
+
+        delay = self._deadline - now
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            missed = int(-delay / self.period)
+            self.dropped += missed
+            self._deadline += missed * self.period
+
+        self._deadline += self.period
+        self._start = time.monotonic()
+        return self._start
+
+    def end_frame(self):
+        """Account for the time spent on the frame"""
+        self.busy += time.monotonic() - self._start
+        self.rendered += 1
+
+    def stats(self):
+        """Achieved versus target frame rate, since the last `reset`
+
+        Returns
+        -------
+        out: FrameStats
+            load is the fraction of the time spent rendering and
+            sending frames. shown_fps is the rate of frames sent to
+            the screen, and replaced the number of frames replaced
+            before being sent, by the worker if any (otherwise every
+            rendered frame is sent).
+        """
+        elapsed = max(time.monotonic() - self._window, 1e-9)
+        if self.worker is None:
+            shown, replaced = self.rendered, 0
+        else:
+            shown, replaced = self._worker_counts()
+            shown -= self._shown
+            replaced -= self._replaced
+        return FrameStats(
+            self.fps,
+            self.rendered / elapsed,
+            self.rendered,
+            self.dropped,
+            self.busy / max(self.rendered, 1) * 1e3,
+            self.busy / elapsed,
+            shown / elapsed,
+            replaced,
+        )
+
+    def report(self):
+        """Log the statistics, and start a new window"""
+        stats = self.stats()
+        logging.info(
+            "{:.1f}/{} fps, {} frames dropped, {:.1f} ms/frame ({:.0f}% of the time), {:.1f} fps shown ({} frames replaced before sending)".format(
+                stats.fps,
+                stats.target_fps,
+                stats.dropped,
+                stats.ms_per_frame,
+                stats.load * 100,
+                stats.shown_fps,
+                stats.replaced,
+            )
+        )
+        self.reset()
+        return stats
+
+
+def animate(
+    show,
+    poll,
+    fps=10,
+    poll_interval=1.0,
+    report_every=60.0,
+    nframes=None,
+    switch=None,
+    worker=None,
+):
+    """Poll the number of alerts, and show smooth transitions
+
+    Parameters
+    ----------
+    show: callable
+        Render and send a frame, given the number of alerts to display
+    poll: callable
+        Return the current number of alerts. It is called in the frame
+        loop, so its duration counts in the frame budget.
+    fps: float
+        Target number of frames per second. Default is 10
+    poll_interval: float
+        Time between two polls, in seconds, also the duration of the
+        transitions. Default is 1
+    report_every: float
+        Time between two logs of the frame rate, in seconds. Default
+        is 60
+    nframes: int
+        Stop after this number of frames. Default is None, meaning
+        never
+    switch: callable
+        Called at the start of each frame, before `poll` and `show`.
+        If it returns True (e.g. another topic is shown), the number of
+        alerts is polled again and shown as is, without transition
+        from the previous one. Default is None
+    worker: DisplayWorker
+        Worker to which `show` submits the frames, to report the
+        frames actually sent to the screen. Default is None
+
+    Returns
+    -------
+    out: FrameStats
+        Statistics since the last report
+    """
+    scheduler = FrameScheduler(fps, worker=worker)
+    transition = None
+    next_poll = last_report = time.monotonic()
+    count = 0
+    while nframes is None or count < nframes:
+        now = scheduler.start_frame()
+        switched = switch is not None and switch()
+        if now >= next_poll or switched:
+            if transition is None or switched:
+                transition = Transition(poll(), duration=poll_interval)
+            else:
+                transition.update(poll(), now)
+            next_poll = now + poll_interval
+
+        show(int(round(transition.value(now))))
+        scheduler.end_frame()
+        count += 1
+
+        if now >= last_report + report_every:
+            scheduler.report()
+            last_report = now
+
+    return scheduler.stats()
@@ -0,0 +1,252 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""SPI and GPIO backends of the screen
+
+A backend creates the SPI device and the GPIO pins used by
+`lcdconfig.RaspberryPi`:
+- `HardwareBackend` uses spidev and gpiozero, on the Raspberry Pi
+- `SimulatedBackend` decodes what is sent into an in-memory
+  framebuffer, to run the watch on any machine
+"""
+
+import struct
+
+import numpy as np
+from PIL import Image
+
+from fink_watch import rgb565
+
+
+class HardwareBackend:
+    """spidev and gpiozero, imported on first use"""
+
+    def spi(self, bus, device):
+        import spidev
+
+        return spidev.SpiDev(bus, device)
+
+    def output(self, pin):
+        from gpiozero import DigitalOutputDevice
+
+        return DigitalOutputDevice(pin, active_high=True, initial_value=False)
+
+    def input(self, pin, pull_up=None, active_state=True):
+        from gpiozero import DigitalInputDevice
+
+        return DigitalInputDevice(pin, pull_up=pull_up, active_state=active_state)
+
+    def pwm(self, pin, frequency):
+        from gpiozero import PWMOutputDevice
+
+        return PWMOutputDevice(pin, frequency=frequency)
+
+
+class SimulatedPin:
+    """GPIO pin, keeping its value"""
+
+    def __init__(self, backend, value=0, frequency=None):
+        self.backend = backend
+        self.value = value
+        self.frequency = frequency
+
+    def on(self):
+        self.backend.gpio_writes += 1
+        self.value = 1
+
+    def off(self):
+        self.backend.gpio_writes += 1
+        self.value = 0
+
+    def close(self):
+        pass
+
+
+class SimulatedSPI:
+    """SPI device, forwarding the bytes to the simulated controller"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.max_speed_hz = 0
+        self.mode = 0
+
+    def writebytes(self, data):
+        self.backend.receive(bytes(data))
+
+    def writebytes2(self, data):
+        self.backend.receive(data)
+
+    def close(self):
+        pass
+
+
+class SimulatedBackend:
+    """In-memory GC9A01 controller
+
+    The command/data stream is decoded with the level of the DC pin:
+    column and row addresses (0x2A, 0x2B) set the window, and memory
+    writes (0x2C) fill it in the framebuffer. Other commands are only
+    recorded in `registers`. Pixels are kept as addressed by the
+    software, i.e. the rotation set by the memory access control
+    (0x36) is not applied.
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels. Default is 240
+    height: int
+        Height size in pixels. Default is 240
+    dc: int
+        GPIO of the data/command pin. Default is 25, as for
+        `lcdconfig.RaspberryPi`
+    decode: bool
+        If False, only count the traffic, without filling the
+        framebuffer, e.g. for benchmarks. Default is True
+    """
+
+    def __init__(self, width=240, height=240, dc=25, decode=True):
+        self.width = width
+        self.height = height
+        self.dc = dc
+        self.decode = decode
+
+        self.pins = {}
+        self.device = None
+        self.framebuffer = np.zeros((height, width), dtype=np.uint16)
+        self.registers = {}
+
+        self._command = None
+        self._params = bytearray()
+        self._columns = (0, width - 1)
+        self._rows = (0, height - 1)
+        self._cursor = 0
+        self._odd = b""
+
+        self.reset_stats()
+
+    def spi(self, bus, device):
+        self.device = SimulatedSPI(self)
+        return self.device
+
+    def output(self, pin):
+        self.pins[pin] = SimulatedPin(self)
+        return self.pins[pin]
+
+    def input(self, pin, pull_up=None, active_state=True):
+        self.pins[pin] = SimulatedPin(self)
+        return self.pins[pin]
+
+    def pwm(self, pin, frequency):
+        self.pins[pin] = SimulatedPin(self, frequency=frequency)
+        return self.pins[pin]
+
+    def reset_stats(self):
+        """Set the counters to zero"""
+        self.nbytes = 0
+        self.ntransfers = 0
+        self.ncommands = 0
+        self.gpio_writes = 0
+        self.transfer_time = 0.0
+
+    def stats(self):
+        """Traffic since the last `reset_stats`
+
+        Returns
+        -------
+        out: dict
+            bytes, transfers (SPI calls), commands, gpio_writes, and
+            transfer_time, the time in seconds to clock the bytes at
+            the frequency of the SPI device
+        """
+        return {
+            "bytes": self.nbytes,
+            "transfers": self.ntransfers,
+            "commands": self.ncommands,
+            "gpio_writes": self.gpio_writes,
+            "transfer_time": self.transfer_time,
+        }
+
+    def receive(self, data):
+        """Decode bytes sent over SPI
+
+        Parameters
+        ----------
+        data: bytes-like
+            Command if the DC pin is low, data otherwise
+        """
+        self.nbytes += len(data)
+        self.ntransfers += 1
+        if self.device is not None and self.device.max_speed_hz:
+            self.transfer_time += 8 * len(data) / self.device.max_speed_hz
+
+        dc = self.pins.get(self.dc)
+        is_command = dc is None or not dc.value
+        if is_command:
+            self.ncommands += len(data)
+        if not self.decode:
+            return
+
+        if is_command:
+            for command in bytes(data):
+                self._command = command
+                self._params = bytearray()
+                if command == 0x2C:
+                    self._cursor = 0
+                    self._odd = b""
+        elif self._command == 0x2C:
+            self._write_pixels(data)
+        elif self._command is not None:
+            self._params += data
+            self.registers[self._command] = bytes(self._params)
+            if len(self._params) >= 4 and self._command in (0x2A, 0x2B):
+                window = struct.unpack(">HH", self._params[:4])
+                if self._command == 0x2A:
+                    self._columns = window
+                else:
+                    self._rows = window
+
+    def _write_pixels(self, data):
+        """Fill the current window, from the cursor"""
+        data = self._odd + bytes(data)
+        size = len(data) // 2 * 2
+        self._odd = data[size:]
+        values = np.frombuffer(data[:size], dtype=">u2")
+
+        x0, x1 = self._columns
+        y0, y1 = self._rows
+        width = x1 - x0 + 1
+        index = self._cursor + np.arange(values.size)
+        self._cursor += values.size
+
+        inside = index < width * (y1 - y0 + 1)
+        x = x0 + index % width
+        y = y0 + index // width
+        inside &= (x < self.width) & (y < self.height)
+        self.framebuffer[y[inside], x[inside]] = values[inside]
+
+    @property
+    def madctl(self):
+        """Memory access control (0x36), if set"""
+        value = self.registers.get(0x36)
+        return value[0] if value else None
+
+    def image(self):
+        """Content of the framebuffer
+
+        Returns
+        -------
+        out: PIL.Image
+            RGB image
+        """
+        return Image.fromarray(rgb565.decode(self.framebuffer, byteswap=False))
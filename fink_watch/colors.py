@@ -14,8 +14,28 @@
 # limitations under the License.
 """Default colors"""
 
+from collections import namedtuple
+
 fink_orange = (229, 68, 11)
 dark_fink_orange = (105, 5, 43, 120)
 light_blue = (59, 59, 196)
 dark_blue = (21, 40, 79)
 polygon_color = (18, 218, 244)
+text_color = (255, 255, 255)
+
+# The text color is optional, white by default
+Palette = namedtuple(
+    "Palette",
+    [
+        "fink_orange",
+        "dark_fink_orange",
+        "light_blue",
+        "dark_blue",
+        "polygon_color",
+        "text",
+    ],
+    defaults=(text_color,),
+)
+default_palette = Palette(
+    fink_orange, dark_fink_orange, light_blue, dark_blue, polygon_color, text_color
+)
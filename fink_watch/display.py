@@ -15,273 +15,316 @@
 """Create the screen for the watch"""
 
 import logging
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 from datetime import datetime
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import numpy as np
 
-from fink_watch.utils import draw_arcs_with_gradient, scale
+from fink_watch.utils import draw_arcs_with_gradient
+from fink_watch import polar
+from fink_watch.glyphs import glyph_atlas
+from fink_watch.geometry import MIN_PROGRESSION_DEG, MAX_PROGRESSION_DEG
+from fink_watch.layout import PROGRESSION, compile_layout
 from fink_watch.observatory import observatories
-from fink_watch.colors import (
-    fink_orange,
-    dark_fink_orange,
-    light_blue,
-    dark_blue,
-    polygon_color,
-)
+from fink_watch.colors import default_palette
 
 logging.basicConfig(level=logging.DEBUG)
 
 
-def screen(
-    width=240, height=240, progression=120000, observatory="Rubin", alert_per_deg=1000
-):
-    """Image to flash on the LCD screen of the watch
+def _polar(image, function, *args):
+    """Run a function of `fink_watch.polar` on an image"""
+    array = np.array(image)
+    function(array, *args)
+    image.paste(Image.fromarray(array))
+
+
+def execute(commands, image, progression_deg=None):
+    """Run a display list on an image, in place
+
+    Parameters
+    ----------
+    commands: list of Command
+        Layer compiled by `layout.compile_layout`
+    image: Image
+        RGB image
+    progression_deg: int
+        Angle reached by the gauge, replacing `layout.PROGRESSION`.
+        Default is None, for layers that do not depend on it.
+    """
+    draw = ImageDraw.Draw(image, "RGBA")
+    for op, args in commands:
+        if op == "arc":
+            coord, start, end, fill, width = args
+            if end == PROGRESSION:
+                end = progression_deg
+            draw.arc(coord, start, end, fill=fill, width=width)
+        elif op == "polar_arc":
+            coord, start, end, fill, width = args
+            if end == PROGRESSION:
+                end = progression_deg
+            _polar(image, polar.draw_arc, coord, start, end, fill, width)
+        elif op == "gradient":
+            draw_arcs_with_gradient(draw, *args)
+        elif op == "polar_gradient":
+            _polar(image, polar.draw_arcs_with_gradient, *args)
+        elif op == "circle":
+            xy, radius, fill = args
+            draw.circle(xy, radius, fill=fill)
+        elif op == "mask":
+            mask, fill = args
+            image.paste(fill, mask=mask)
+        elif op == "polygons":
+            angles, vertices, until, fill, width = args
+            if until == PROGRESSION:
+                vertices = vertices[: np.searchsorted(angles, progression_deg)]
+            for polygon in vertices:
+                draw.polygon(polygon, fill=fill, width=width)
+        elif op == "text":
+            size, xy, text, fill = args
+            glyph_atlas(size).draw_text(image, xy, text, fill=fill)
+        else:
+            raise ValueError("Unknown command: {}".format(op))
+
+
+@lru_cache(maxsize=8)
+def background_layer(width, height, observatory, palette=default_palette):
+    """Static part of the watch face
+
+    Everything that depends neither on the progression nor on the time
+    is rendered once per (width, height, observatory, palette), and
+    re-used by `screen` for every frame.
 
     Parameters
     ----------
     width: int
-        Width size in pixels. Default is 240
+        Width size in pixels
     height: int
-        Height size in pixels. Default is 240
+        Height size in pixels
+    observatory: str
+        Name of the observatory, as displayed below the clock
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+
+    Returns
+    -------
+    out: Image
+        Cached RGB image. Do not draw on it, use a copy.
+    """
+    background = Image.new("RGB", (width, height), (0, 0, 0))
+    execute(compile_layout(width, height, observatory, palette).background, background)
+    return background
+
+
+def progression_angle(progression, alert_per_deg=1000):
+    """Angle reached by the gauge
+
+    Parameters
+    ----------
     progression: int
         Number of incoming alerts
+    alert_per_deg: int
+        Number of alerts per degree. Default is 1000
 
     Returns
     -------
-    out: Image
-        Image to be shown on screen
+    out: int
+        Angle in degree, between 90 and 360
     """
-    # Angles are measured from 3 o'clock, increasing clockwise.
-    min_progression_deg = 90
-    max_progression_deg = 360
     progression_deg = (
-        np.min((max_progression_deg - min_progression_deg, progression / alert_per_deg))
+        np.min((MAX_PROGRESSION_DEG - MIN_PROGRESSION_DEG, progression / alert_per_deg))
         + 90
     )
+    return int(progression_deg)
 
-    # Create blank image for drawing.
-    background = Image.new("RGB", (width, height), "BLACK")
-    draw = ImageDraw.Draw(background, "RGBA")
-
-    # Outer ring
-    coord_full = (0, 0, width, height)
-    draw.arc(coord_full, 0, 360, fill=dark_fink_orange, width=4)
-
-    draw_arcs_with_gradient(
-        draw,
-        coord=coord_full,
-        f_co=dark_blue,
-        t_co=light_blue,
-        angles0=[0, 80, 190, 250],
-        angles=[60, 60, 30, 80],
-        interval=50,
-        width=5,
-    )
 
-    # Second ring
-    draw_arcs_with_gradient(
-        draw,
-        coord=(
-            scale(width, 4),
-            scale(height, 4),
-            width - scale(width, 4),
-            height - scale(height, 4),
-        ),
-        f_co=(*fink_orange, 120),
-        t_co=(*fink_orange, 120),
-        angles0=[10, 60, 120, 180, 220, 260, 320],
-        angles=[30, 40, 20, 30, 20, 30, 20],
-        interval=50,
-        width=5,
-    )
+def format_counter(progression):
+    """Text of the counter
 
-    # Third rings
-    draw.arc(
-        (
-            scale(width, 12.5),
-            scale(height, 12.5),
-            width - scale(width, 12.5),
-            height - scale(height, 12.5),
-        ),
-        0,
-        360,
-        fill=(*fink_orange, 120),
-        width=8,
-    )
-    draw.arc(
-        (
-            scale(width, 12.5),
-            scale(height, 12.5),
-            width - scale(width, 12.5),
-            height - scale(height, 12.5),
-        ),
-        90,
-        int(progression_deg),
-        fill=fink_orange,
-        width=8,
-    )
-
-    # Ticks major/minor
-    step_major_ticks = 10
-    step_minor_ticks = 2
-    for angle in range(min_progression_deg, max_progression_deg, step_major_ticks):
-        x0 = width / 2 + (width / 2 - scale(width, 9.5)) * np.cos(np.deg2rad(angle))
-        y0 = height / 2 + (height / 2 - scale(height, 9.5)) * np.sin(np.deg2rad(angle))
-        x1 = width / 2 + (width / 2 - scale(width, 12)) * np.cos(np.deg2rad(angle))
-        y1 = height / 2 + (height / 2 - scale(height, 12)) * np.sin(np.deg2rad(angle))
-        draw.line([(x0, y0), (x1, y1)], fill=(255, 255, 255), width=2)
-
-    for angle in range(min_progression_deg, max_progression_deg - 10, step_minor_ticks):
-        x0 = width / 2 + (width / 2 - scale(width, 11.8)) * np.cos(np.deg2rad(angle))
-        y0 = height / 2 + (height / 2 - scale(height, 11.8)) * np.sin(np.deg2rad(angle))
-        x1 = width / 2 + (width / 2 - scale(width, 12)) * np.cos(np.deg2rad(angle))
-        y1 = height / 2 + (height / 2 - scale(width, 12)) * np.sin(np.deg2rad(angle))
-        draw.line([(x0, y0), (x1, y1)], fill=(255, 255, 255), width=1)
-
-    # Inner rings
-    for i in range(20):
-        radius = scale(width, 28 + i / 5)
-        transparency = int(255 / (np.abs(i - 10) + 1))
-        draw.arc(
-            (radius, radius, width - radius, height - radius),
-            0,
-            360,
-            fill=(*dark_blue, transparency),
-            width=4,
-        )
-
-    draw.arc(
-        (
-            scale(width, 27),
-            scale(height, 27),
-            width - scale(width, 27),
-            height - scale(height, 27),
-        ),
-        90,
-        360,
-        fill=dark_fink_orange,
-        width=3,
-    )
-    draw.arc(
-        (
-            scale(width, 27),
-            scale(height, 27),
-            width - scale(width, 27),
-            height - scale(height, 27),
-        ),
-        90,
-        int(progression_deg),
-        fill=fink_orange,
-        width=3,
-    )
+    Parameters
+    ----------
+    progression: int
+        Number of incoming alerts
 
-    # Text: number of alerts
+    Returns
+    -------
+    out: str
+        e.g. 999, 120K or 1.2M
+    """
     if progression < 1e3:
         text = "{}".format(progression)
     elif progression < 1e6:
         text = "{}K".format(int(progression / 1e3))
     elif progression < 1e9:
         text = "{:.1f}M".format(progression / 1e6)
+    return text
 
-    # Clock
-    size = scale(width, 11)
-    font = ImageFont.truetype("fonts/DS-DIGIB.TTF", int(size))
-    now = datetime.now(tz=ZoneInfo(observatories[observatory]))
-    draw.text(
-        (width / 2, width / 2 - size), now.strftime("%H:%M"), anchor="mt", font=font
-    )
 
-    size = scale(width, 3)
-    font = ImageFont.truetype("fonts/DS-DIGIB.TTF", int(size))
-    draw.text(
-        (width / 2, width / 2),
-        "---",
-        anchor="mt",
-        font=font,
-    )
+def format_rate(rate):
+    """Text of the rate of alerts
 
-    size = scale(width, 7)
-    font = ImageFont.truetype("fonts/DS-DIGIB.TTF", int(size))
-    draw.text(
-        (width / 2, width / 2 + 2 / 3 * size),
-        observatory,
-        anchor="mt",
-        font=font,
-    )
+    Parameters
+    ----------
+    rate: float
+        Alerts per second, or None if unknown
+
+    Returns
+    -------
+    out: str
+        e.g. 0/s, 12/s or 1.2K/s, empty if unknown
+    """
+    if rate is None:
+        return ""
+    if rate < 1e3:
+        return "{}/s".format(int(round(rate)))
+    return "{:.1f}K/s".format(rate / 1e3)
 
-    # Counter
-    draw.circle(
-        (3 * width / 4, 3 * height / 4),
-        scale(width, 14),
-        fill=(0, 0, 0),
-        width=4,
+
+def gauge(width, height, progression_deg, observatory, palette=default_palette):
+    """Watch face without the clock and the counter
+
+    The gauge layer of the layout (progression arcs and filled
+    polygons) is drawn on top of a copy of the cached
+    `background_layer`.
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    progression_deg: int
+        Angle reached by the gauge, see `progression_angle`
+    observatory: str
+        Name of the observatory
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+
+    Returns
+    -------
+    out: Image
+    """
+    background = background_layer(width, height, observatory, palette).copy()
+    execute(
+        compile_layout(width, height, observatory, palette).gauge,
+        background,
+        progression_deg,
     )
-    for i in range(20):
-        radius = scale(width, 16 - i / 5)
-        transparency = int(255 / (np.abs(i - 10) + 1))
-        draw.arc(
-            (
-                3 / 4 * width - radius,
-                3 / 4 * height - radius,
-                3 / 4 * width + radius,
-                3 / 4 * height + radius,
+    return background
+
+
+def text_items(
+    width,
+    height,
+    progression,
+    observatory,
+    now=None,
+    stale=False,
+    rate=None,
+    palette=default_palette,
+):
+    """Clock and counter, drawn on top of the gauge
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    progression: int
+        Number of incoming alerts
+    observatory: str
+        Name of the observatory (local time)
+    now: datetime
+        Time to display. Default is None, meaning the current time
+    stale: bool
+        If True, mark the counter as not up to date. Default is False
+    rate: float
+        Alerts per second, shown above the counter. Default is None,
+        meaning not shown
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+
+    Returns
+    -------
+    out: list of tuple
+        (font size, anchor coordinates, text, color), anchored at the
+        middle top of the text
+    """
+    if now is None:
+        now = datetime.now(tz=ZoneInfo(observatories[observatory]))
+
+    clock = now.strftime("%H:%M")
+    counter = format_counter(progression)
+    return [
+        (
+            size,
+            xy,
+            template.format(
+                clock=clock,
+                counter=counter,
+                rate=format_rate(rate),
+                stale="stale" if stale else "",
             ),
-            0,  # 30,
-            360,  # 120,
-            fill=(*dark_blue, transparency),
-            width=2,
+            color,
         )
-    size = scale(width, 10)
-    font = ImageFont.truetype("fonts/DS-DIGIB.TTF", int(size))
-    draw.text(
-        (3 / 4 * width, 3 / 4 * height - size / 3),
-        text,
-        anchor="mt",
-        font=font,
-    )
+        for _, (size, xy, template, color) in compile_layout(
+            width, height, observatory, palette
+        ).text
+    ]
 
-    # Polygons
-    w = 7
-    space = 3
-    angles = range(min_progression_deg, max_progression_deg, w + space)
-    for index, angle in enumerate(angles):
-        x0 = width / 2 + (width / 2 - scale(width, 16.6)) * np.cos(np.deg2rad(angle))
-        y0 = width / 2 + (width / 2 - scale(width, 16.6)) * np.sin(np.deg2rad(angle))
-        x1 = width / 2 + (width / 2 - scale(width, 25)) * np.cos(np.deg2rad(angle))
-        y1 = width / 2 + (width / 2 - scale(width, 25)) * np.sin(np.deg2rad(angle))
-        x2 = width / 2 + (width / 2 - scale(width, 16.6)) * np.cos(
-            np.deg2rad(angle + w)
-        )
-        y2 = width / 2 + (width / 2 - scale(width, 16.6)) * np.sin(
-            np.deg2rad(angle + w)
-        )
-        x3 = width / 2 + (width / 2 - scale(width, 25)) * np.cos(np.deg2rad(angle + w))
-        y3 = width / 2 + (width / 2 - scale(width, 25)) * np.sin(np.deg2rad(angle + w))
-        draw.polygon(
-            [(x0, y0), (x2, y2), (x3, y3), (x1, y1)], fill=(*polygon_color, 40), width=2
-        )
 
-    angles = range(min_progression_deg, int(progression_deg), w + space)
-    for index, angle in enumerate(angles):
-        x0 = width / 2 + (width / 2 - scale(width, 16.6)) * np.cos(np.deg2rad(angle))
-        y0 = width / 2 + (width / 2 - scale(width, 16.6)) * np.sin(np.deg2rad(angle))
-        x1 = width / 2 + (width / 2 - scale(width, 25)) * np.cos(np.deg2rad(angle))
-        y1 = width / 2 + (width / 2 - scale(width, 25)) * np.sin(np.deg2rad(angle))
-        x2 = width / 2 + (width / 2 - scale(width, 16.6)) * np.cos(
-            np.deg2rad(angle + w)
-        )
-        y2 = width / 2 + (width / 2 - scale(width, 16.6)) * np.sin(
-            np.deg2rad(angle + w)
-        )
-        x3 = width / 2 + (width / 2 - scale(width, 25)) * np.cos(np.deg2rad(angle + w))
-        y3 = width / 2 + (width / 2 - scale(width, 25)) * np.sin(np.deg2rad(angle + w))
-        transparency = int(255 - index * 255 / len(angles))
-        draw.polygon(
-            [(x0, y0), (x2, y2), (x3, y3), (x1, y1)],
-            fill=(*polygon_color, 255),
-            width=2,
-        )
+def screen(
+    width=240,
+    height=240,
+    progression=120000,
+    observatory="Rubin",
+    alert_per_deg=1000,
+    palette=default_palette,
+    now=None,
+    stale=False,
+    rate=None,
+):
+    """Image to flash on the LCD screen of the watch
 
-    return background
+    Parameters
+    ----------
+    width: int
+        Width size in pixels. Default is 240
+    height: int
+        Height size in pixels. Default is 240
+    progression: int
+        Number of incoming alerts
+    observatory: str
+        Name of the observatory (local time). Default is Rubin
+    alert_per_deg: int
+        Number of alerts per degree. Default is 1000
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+    now: datetime
+        Time to display. Default is None, meaning the current time
+    stale: bool
+        If True, mark the counter as not up to date. Default is False
+    rate: float
+        Alerts per second, shown above the counter. Default is None,
+        meaning not shown
+
+    Returns
+    -------
+    out: Image
+        Image to be shown on screen
+    """
+    image = gauge(
+        width,
+        height,
+        progression_angle(progression, alert_per_deg),
+        observatory,
+        palette,
+    )
+    for size, xy, text, color in text_items(
+        width, height, progression, observatory, now, stale, rate, palette
+    ):
+        glyph_atlas(size).draw_text(image, xy, text, fill=color)
+
+    return image
@@ -0,0 +1,229 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Offline rendering of series of frames, to PNG, GIF or raw RGB565
+
+Frames are rendered in parallel, and written to disk as they come, by
+batches, so that long series never sit in memory.
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+from PIL import GifImagePlugin
+
+from fink_watch import rgb565
+from fink_watch.colors import default_palette
+from fink_watch.display import screen
+
+FORMATS = ["png", "gif", "rgb565"]
+
+
+def series(start, stop, nframes, alerts_min=0, alerts_max=270000):
+    """Times and numbers of alerts, linearly spaced
+
+    Parameters
+    ----------
+    start: str
+        First time displayed, as HH:MM
+    stop: str
+        Last time displayed, as HH:MM. If before `start`, it is taken
+        on the next day, as for a night.
+    nframes: int
+        Number of frames
+    alerts_min: int
+        Number of alerts in the first frame. Default is 0
+    alerts_max: int
+        Number of alerts in the last frame. Default is 270000
+
+    Returns
+    -------
+    out: list of tuple
+        (number of alerts, datetime) for each frame
+    """
+    start = datetime.strptime(start, "%H:%M")
+    stop = datetime.strptime(stop, "%H:%M")
+    if stop < start:
+        stop += timedelta(days=1)
+
+    fractions = np.linspace(0, 1, nframes)
+    return [
+        (
+            int(round(alerts_min + (alerts_max - alerts_min) * fraction)),
+            start + (stop - start) * float(fraction),
+        )
+        for fraction in fractions
+    ]
+
+
+def guess_format(path):
+    """Format of the export, from the output path
+
+    Parameters
+    ----------
+    path: str
+        Folder (PNG sequence), or .gif or .rgb565 file
+
+    Returns
+    -------
+    out: str
+        Among `FORMATS`
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".gif":
+        return "gif"
+    if extension in [".rgb565", ".raw"]:
+        return "rgb565"
+    return "png"
+
+
+def _render(args):
+    """Render one frame, encoded for the export (worker)"""
+    fmt, width, height, progression, now, observatory, alert_per_deg, palette, fps = (
+        args
+    )
+    image = screen(
+        width=width,
+        height=height,
+        progression=progression,
+        observatory=observatory,
+        alert_per_deg=alert_per_deg,
+        palette=palette,
+        now=now,
+    )
+    if fmt == "png":
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+    if fmt == "gif":
+        # Each frame has its own palette, the one of the first frame
+        # is also used as the global one in the header
+        image = image.quantize(colors=256)
+        data = b"".join(
+            GifImagePlugin.getdata(
+                image, duration=int(1000 / fps), include_color_table=True
+            )
+        )
+        header, _ = GifImagePlugin.getheader(image, info={"loop": 0})
+        return b"".join(header), data
+    return rgb565.encode(np.asarray(image)).tobytes()
+
+
+def _write_png(path, frames):
+    os.makedirs(path, exist_ok=True)
+    for index, data in enumerate(frames):
+        with open(os.path.join(path, "frame_{:05d}.png".format(index)), "wb") as f:
+            f.write(data)
+
+
+def _write_gif(path, frames):
+    """Write an animated GIF frame by frame"""
+    with open(path, "wb") as f:
+        for index, (header, data) in enumerate(frames):
+            if index == 0:
+                f.write(header)
+            f.write(data)
+        # Trailer
+        f.write(b";")
+
+
+def _write_rgb565(path, frames):
+    with open(path, "wb") as f:
+        for data in frames:
+            f.write(data)
+
+
+def _batches(tasks, size):
+    for i in range(0, len(tasks), size):
+        yield tasks[i : i + size]
+
+
+def export_frames(
+    path,
+    frames,
+    width=240,
+    height=240,
+    observatory="Rubin",
+    alert_per_deg=1000,
+    palette=default_palette,
+    fmt=None,
+    fps=10,
+    processes=None,
+    batch=64,
+):
+    """Render a series of frames, and write them to disk
+
+    Parameters
+    ----------
+    path: str
+        Output folder for PNG, or file for GIF and RGB565
+    frames: list of tuple
+        (number of alerts, datetime) for each frame, see `series`
+    width: int
+        Width size in pixels. Default is 240
+    height: int
+        Height size in pixels. Default is 240
+    observatory: str
+        Name of the observatory. Default is Rubin
+    alert_per_deg: int
+        Number of alerts per degree. Default is 1000
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+    fmt: str
+        png, gif or rgb565 (frames concatenated, high byte first as
+        sent to the screen). Default is None, meaning guessed from
+        `path`
+    fps: float
+        Frames per second, for GIF. Default is 10
+    processes: int
+        Number of processes. Default is None, meaning all cores
+    batch: int
+        Maximum number of frames rendered ahead of the writer.
+        Default is 64
+    """
+    if fmt is None:
+        fmt = guess_format(path)
+    if fmt not in FORMATS:
+        raise ValueError("fmt must be among {}".format(FORMATS))
+
+    tasks = [
+        (fmt, width, height, progression, now, observatory, alert_per_deg, palette, fps)
+        for progression, now in frames
+    ]
+
+    def rendered(pool):
+        for chunk in _batches(tasks, batch):
+            if pool is None:
+                yield from map(_render, chunk)
+            else:
+                yield from pool.imap(_render, chunk)
+
+    def write(frames):
+        if fmt == "png":
+            _write_png(path, frames)
+        elif fmt == "gif":
+            _write_gif(path, frames)
+        else:
+            _write_rgb565(path, frames)
+
+    logging.info("Exporting {} frames to {} ({})".format(len(tasks), path, fmt))
+    if processes == 1:
+        write(rendered(None))
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            write(rendered(pool))
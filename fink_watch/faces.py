@@ -0,0 +1,170 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Several topics on one watch, shown in turn or combined"""
+
+import time
+from collections import namedtuple
+
+Face = namedtuple("Face", ["topic", "observatory", "alert_per_deg"])
+
+
+def make_faces(topics, observatories, alert_per_deg):
+    """Pair the topics with their observatory and scale
+
+    Parameters
+    ----------
+    topics: list of str
+        Topic names
+    observatories: list of str
+        Observatory of each topic, or a single one for all of them
+    alert_per_deg: list of int
+        Number of alerts per degree for each topic, or a single one
+        for all of them
+
+    Returns
+    -------
+    out: list of Face
+    """
+
+    def expand(values, name):
+        if len(values) == 1:
+            return list(values) * len(topics)
+        if len(values) != len(topics):
+            raise ValueError(
+                "Give one {} for all the topics, or one per topic".format(name)
+            )
+        return list(values)
+
+    return [
+        Face(*args)
+        for args in zip(
+            topics,
+            expand(observatories, "observatory"),
+            expand(alert_per_deg, "alert_per_deg"),
+        )
+    ]
+
+
+class FaceCycle:
+    """Face to show, and its number of alerts
+
+    The face on screen is chosen by `select`, once per frame, so that
+    the face and its number of alerts always go together, whatever the
+    time between the calls.
+
+    Parameters
+    ----------
+    faces: list of Face
+        One face per topic, in the order of the tracked topics
+    period: float
+        Time each face stays on screen, in seconds. Default is 10
+    combine: bool
+        If True, always show the first face, with the sum of the
+        alerts of all the topics. Default is False
+    """
+
+    def __init__(self, faces, period=10.0, combine=False):
+        if not period > 0:
+            raise ValueError("The period must be positive, not {}".format(period))
+        self.faces = faces
+        self.period = period
+        self.combine = combine
+        self.selected = 0
+
+    def index(self, now=None):
+        """Index of the face to show at a given time
+
+        Parameters
+        ----------
+        now: float
+            Time from `time.monotonic`. Default is None, meaning now
+
+        Returns
+        -------
+        out: int
+        """
+        if self.combine or len(self.faces) == 1:
+            return 0
+        if now is None:
+            now = time.monotonic()
+        return int(now / self.period) % len(self.faces)
+
+    def select(self, now=None):
+        """Choose the face on screen, see `index`
+
+        Parameters
+        ----------
+        now: float
+            Time from `time.monotonic`. Default is None, meaning now
+
+        Returns
+        -------
+        out: bool
+            True if the face changed
+        """
+        index = self.index(now)
+        changed = index != self.selected
+        self.selected = index
+        return changed
+
+    def current(self):
+        """Face on screen
+
+        Returns
+        -------
+        out: Face
+        """
+        return self.faces[self.selected]
+
+    def count(self, totals):
+        """Number of alerts of the face on screen
+
+        Parameters
+        ----------
+        totals: tuple of int
+            Number of alerts of each topic (None for a missing topic),
+            see `poll.Snapshot`, or None if unknown
+
+        Returns
+        -------
+        out: int
+            0 if unknown or missing
+        """
+        if totals is None:
+            return 0
+        if self.combine:
+            return sum(total for total in totals if total is not None)
+        total = totals[self.selected]
+        return total if total is not None else 0
+
+    def rate(self, rates):
+        """Alerts per second of the face on screen
+
+        Parameters
+        ----------
+        rates: tuple of float
+            Rate of each topic, see `poll.Snapshot`, or None if unknown
+
+        Returns
+        -------
+        out: float
+            None if unknown
+        """
+        if rates is None:
+            return None
+        if self.combine:
+            known = [rate for rate in rates if rate is not None]
+            return sum(known) if known else None
+        return rates[self.selected]
@@ -0,0 +1,248 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Pre-rendered gauge states, stored on disk"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+from PIL import Image
+
+from fink_watch import rgb565
+from fink_watch.colors import default_palette
+from fink_watch.display import gauge, progression_angle, text_items
+from fink_watch.geometry import MIN_PROGRESSION_DEG, MAX_PROGRESSION_DEG
+from fink_watch.glyphs import glyph_atlas
+
+# Bump it when the look of the gauge changes, to invalidate the banks
+BANK_VERSION = 3
+
+NSTATES = MAX_PROGRESSION_DEG - MIN_PROGRESSION_DEG + 1
+
+
+def default_cache_dir():
+    """Folder for the frame banks: $XDG_CACHE_HOME/fink-watch"""
+    root = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(root, "fink-watch")
+
+
+def bank_path(width, height, observatory, palette=default_palette, cache_dir=None):
+    """Path of the frame bank for a given face
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    observatory: str
+        Name of the observatory
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+    cache_dir: str
+        Folder for the banks. Default is None, meaning
+        `default_cache_dir()`
+
+    Returns
+    -------
+    out: str
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    digest = hashlib.sha1(repr(tuple(palette)).encode()).hexdigest()[:8]
+    name = "bank_v{}_{}x{}_{}_{}.rgb565".format(
+        BANK_VERSION, width, height, observatory, digest
+    )
+    return os.path.join(cache_dir, name)
+
+
+def _render_states(args):
+    """Render some gauge states in the bank (worker)"""
+    path, width, height, observatory, palette, states = args
+    frames = np.memmap(path, dtype=np.uint16, mode="r+", shape=(NSTATES, height, width))
+    encoder = rgb565.RGB565Encoder(width, height)
+    for progression_deg in states:
+        encoder.encode(gauge(width, height, progression_deg, observatory, palette))
+        frames[progression_deg - MIN_PROGRESSION_DEG] = encoder.array
+    frames.flush()
+    return len(states)
+
+
+def build_frame_bank(
+    path, width, height, observatory, palette=default_palette, processes=None
+):
+    """Render every gauge state, in parallel, in a file
+
+    The bank is written in a temporary file, and moved to `path` once
+    complete, so an interrupted build is never used.
+
+    Parameters
+    ----------
+    path: str
+        Output file, see `bank_path`
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    observatory: str
+        Name of the observatory
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+    processes: int
+        Number of processes. Default is None, meaning all cores
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    np.memmap(tmp, dtype=np.uint16, mode="w+", shape=(NSTATES, height, width)).flush()
+
+    states = list(range(MIN_PROGRESSION_DEG, MAX_PROGRESSION_DEG + 1))
+    tasks = [
+        (tmp, width, height, observatory, palette, states[i::processes])
+        for i in range(processes)
+    ]
+    logging.info("Rendering {} gauge states in {}".format(len(states), path))
+    try:
+        if processes == 1:
+            for task in tasks:
+                _render_states(task)
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                pool.map(_render_states, tasks)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class FrameBank:
+    """Gauge states, encoded in RGB565 and memory-mapped from disk
+
+    The bank is built on first use (see `build_frame_bank`), and
+    re-used as is by the next instances.
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    observatory: str
+        Name of the observatory
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+    cache_dir: str
+        Folder for the banks. Default is None, meaning
+        `default_cache_dir()`
+    processes: int
+        Number of processes to build the bank. Default is None,
+        meaning all cores
+    """
+
+    def __init__(
+        self,
+        width,
+        height,
+        observatory,
+        palette=default_palette,
+        cache_dir=None,
+        processes=None,
+    ):
+        self.width = width
+        self.height = height
+        self.observatory = observatory
+        self.palette = palette
+
+        self.path = bank_path(width, height, observatory, palette, cache_dir)
+        if (
+            not os.path.exists(self.path)
+            or os.path.getsize(self.path) != NSTATES * width * height * 2
+        ):
+            build_frame_bank(self.path, width, height, observatory, palette, processes)
+
+        self.frames = np.memmap(
+            self.path, dtype=np.uint16, mode="r", shape=(NSTATES, height, width)
+        )
+        self.buffer = np.empty((height, width), dtype=np.uint16)
+
+    def frame(self, progression_deg):
+        """Encoded gauge, without the clock and the counter
+
+        Parameters
+        ----------
+        progression_deg: int
+            Angle reached by the gauge, see `progression_angle`
+
+        Returns
+        -------
+        out: np.array
+            Read-only uint16 array of shape (height, width)
+        """
+        return self.frames[progression_deg - MIN_PROGRESSION_DEG]
+
+    def render(self, progression, alert_per_deg=1000, now=None, stale=False, rate=None):
+        """Encoded watch face, equivalent to `screen`
+
+        Only the pixels under the clock and the counter are decoded,
+        drawn and encoded again.
+
+        Parameters
+        ----------
+        progression: int
+            Number of incoming alerts
+        alert_per_deg: int
+            Number of alerts per degree. Default is 1000
+        now: datetime
+            Time to display. Default is None, meaning the current time
+        stale: bool
+            If True, mark the counter as not up to date. Default is
+            False
+        rate: float
+            Alerts per second, shown above the counter. Default is
+            None, meaning not shown
+
+        Returns
+        -------
+        out: np.array
+            uint16 array of shape (height, width), high byte first. It
+            is re-used by the next call.
+        """
+        np.copyto(
+            self.buffer, self.frame(progression_angle(progression, alert_per_deg))
+        )
+        for size, xy, text, color in text_items(
+            self.width,
+            self.height,
+            progression,
+            self.observatory,
+            now,
+            stale,
+            rate,
+            self.palette,
+        ):
+            atlas = glyph_atlas(size)
+            box = atlas.bbox(xy, text)
+            if box is None:
+                continue
+            x0, y0 = max(box[0], 0), max(box[1], 0)
+            x1, y1 = min(box[2], self.width), min(box[3], self.height)
+            patch = Image.fromarray(rgb565.decode(self.buffer[y0:y1, x0:x1]))
+            atlas.draw_text(patch, (xy[0] - x0, xy[1] - y0), text, fill=color)
+            self.buffer[y0:y1, x0:x1] = rgb565.encode(np.asarray(patch))
+        return self.buffer
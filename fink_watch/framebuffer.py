@@ -0,0 +1,220 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Linux framebuffer output (fbtft, /dev/fbN), memory-mapped"""
+
+import fcntl
+import mmap
+import os
+import stat
+import struct
+
+import numpy as np
+
+from fink_watch.rgb565 import RGB565Encoder, pack
+
+# ioctl to get the variable screen info (linux/fb.h)
+FBIOGET_VSCREENINFO = 0x4600
+
+# Start of struct fb_var_screeninfo: xres, yres, xres_virtual,
+# yres_virtual, xoffset, yoffset, bits_per_pixel (160 bytes in total)
+VSCREENINFO = struct.Struct("7I")
+VSCREENINFO_SIZE = 160
+
+
+def _screeninfo(fd, path):
+    """Visible and virtual resolutions of a framebuffer device
+
+    Parameters
+    ----------
+    fd: int
+        File descriptor of the device
+    path: str
+        Path of the device, for the error message
+
+    Returns
+    -------
+    out: tuple of int
+        xres, yres, xres_virtual, yres_virtual, xoffset, yoffset,
+        bits_per_pixel
+    """
+    try:
+        info = fcntl.ioctl(fd, FBIOGET_VSCREENINFO, bytes(VSCREENINFO_SIZE))
+    except OSError as e:
+        raise ValueError("{} is not a framebuffer: {}".format(path, e))
+    return VSCREENINFO.unpack_from(info)
+
+
+def _sysfs(device, name):
+    """Attribute of a framebuffer device, or None if unknown"""
+    path = os.path.join("/sys/class/graphics", os.path.basename(device), name)
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class Framebuffer:
+    """RGB565 framebuffer, written in place through `mmap`
+
+    It has the same methods as `LCD_1inch28` for the watch, so that
+    it can be used in its place. An encoded frame is presented by a
+    single copy into the mapped memory, and an image is packed there
+    directly, see `rgb565.pack`.
+
+    The whole virtual screen is mapped, and the frames are written to
+    the visible part, at the panning offset of the device when opened.
+
+    Parameters
+    ----------
+    path: str
+        Framebuffer device, e.g. /dev/fb1, or a regular file acting as
+        one (created if needed)
+    width: int
+        Width size in pixels, for files. Devices report their own size.
+    height: int
+        Height size in pixels, for files. Devices report their own
+        size.
+    """
+
+    def __init__(self, path, width=None, height=None):
+        self.path = path
+        device = os.path.exists(path) and stat.S_ISCHR(os.stat(path).st_mode)
+
+        if device:
+            self._fd = os.open(path, os.O_RDWR)
+            try:
+                width, height, xvirtual, yvirtual, xoffset, yoffset, bpp = _screeninfo(
+                    self._fd, path
+                )
+                if bpp != 16:
+                    raise ValueError(
+                        "{} is not RGB565 ({} bits per pixel)".format(path, bpp)
+                    )
+            except ValueError:
+                os.close(self._fd)
+                raise
+        else:
+            if width is None or height is None:
+                raise ValueError(
+                    "Size of {} unknown, give width and height".format(path)
+                )
+            xvirtual, yvirtual, xoffset, yoffset = width, height, 0, 0
+        self.width = width
+        self.height = height
+
+        # Bytes per line of the virtual screen
+        stride = _sysfs(path, "stride") if device else None
+        self.stride = int(stride) if stride is not None else 2 * xvirtual
+        nbytes = self.stride * yvirtual
+
+        if not device:
+            # Regular file, standing in for a device
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            if os.fstat(self._fd).st_size < nbytes:
+                os.ftruncate(self._fd, nbytes)
+        self._map = mmap.mmap(self._fd, nbytes)
+
+        # Visible pixels, in native byte order as the kernel expects
+        self.pixels = np.frombuffer(self._map, dtype=np.uint16).reshape(
+            yvirtual, self.stride // 2
+        )[yoffset : yoffset + height, xoffset : xoffset + width]
+        self._scratch = np.zeros((height, width), dtype=np.uint16)
+        self.encoder = RGB565Encoder(width, height)
+
+    def Init(self):
+        pass
+
+    def bl_DutyCycle(self, duty):
+        pass
+
+    def clear(self):
+        """Fill the screen with white"""
+        self.pixels.fill(0xFFFF)
+
+    def ShowImage(self, Image):
+        """Encode an image directly into the mapped memory
+
+        Parameters
+        ----------
+        Image: PIL.Image
+            RGB or RGBA image, of the size of the framebuffer
+        """
+        if Image.size != (self.width, self.height):
+            raise ValueError(
+                "Image must be same dimensions as display ({}x{}).".format(
+                    self.width, self.height
+                )
+            )
+        if Image.mode not in ("RGB", "RGBA"):
+            Image = Image.convert("RGB")
+        pack(np.asarray(Image), self.pixels, self._scratch)
+
+    def ShowBuffer(self, buffer):
+        """Copy an encoded frame into the mapped memory
+
+        Parameters
+        ----------
+        buffer: bytes-like
+            Full RGB565 frame, high byte first as for `LCD_1inch28`.
+            The bytes are swapped during the copy.
+        """
+        pix = np.frombuffer(buffer, dtype=">u2")
+        if pix.size != self.width * self.height:
+            raise ValueError(
+                "Buffer must be same dimensions as display ({}x{}).".format(
+                    self.width, self.height
+                )
+            )
+        np.copyto(self.pixels, pix.reshape(self.height, self.width))
+
+    def rgb565(self, Image):
+        """Convert an image to RGB565, high byte first as `ShowBuffer` expects
+
+        Parameters
+        ----------
+        Image: PIL.Image
+            Image to convert
+
+        Returns
+        -------
+        pix: np.array
+            uint16 array of shape (height, width). It is the buffer of
+            the encoder, re-used by the next conversion.
+        """
+        if Image.size != (self.width, self.height):
+            raise ValueError(
+                "Image must be same dimensions as display ({}x{}).".format(
+                    self.width, self.height
+                )
+            )
+        self.encoder.encode(Image)
+        return self.encoder.array
+
+    def ShowImageDiff(self, Image, gap=8):
+        """Same as `ShowImage`: writing memory is cheap"""
+        self.ShowImage(Image)
+        return [(0, 0, self.width, self.height)]
+
+    def ShowBufferDiff(self, buffer, gap=8):
+        """Same as `ShowBuffer`: writing memory is cheap"""
+        self.ShowBuffer(buffer)
+        return [(0, 0, self.width, self.height)]
+
+    def module_exit(self):
+        """Unmap the framebuffer"""
+        self.pixels = None
+        self._map.close()
+        os.close(self._fd)
@@ -0,0 +1,130 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Precomputed geometry of the watch face"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from fink_watch.utils import scale
+
+# Angles are measured from 3 o'clock, increasing clockwise.
+MIN_PROGRESSION_DEG = 90
+MAX_PROGRESSION_DEG = 360
+
+
+def ring_points(width, height, pc, angles):
+    """Points on an ellipse inset from the border of the screen
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    pc: float
+        Inset from the border, in percentage of the screen size
+    angles: np.array
+        Angles in degree
+
+    Returns
+    -------
+    out: np.array
+        Array of shape (len(angles), 2) with (x, y) coordinates
+    """
+    rad = np.deg2rad(angles)
+    x = width / 2 + (width / 2 - scale(width, pc)) * np.cos(rad)
+    y = height / 2 + (height / 2 - scale(height, pc)) * np.sin(rad)
+    return np.stack((x, y), axis=-1)
+
+
+@lru_cache(maxsize=16)
+def ticks(width, height, inset, start, stop, step):
+    """Ends of the ticks of a graduation
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    inset: tuple of float
+        Insets of the two ends, in percentage of the screen size
+    start: float
+        Angle of the first tick, in degree
+    stop: float
+        Angle after the last tick, in degree (excluded)
+    step: float
+        Angle between two ticks, in degree
+
+    Returns
+    -------
+    out: np.array
+        Read-only array of shape (N, 2, 2) with the two ends of each tick
+    """
+    angles = np.arange(start, stop, step)
+    out = np.stack(
+        (
+            ring_points(width, height, inset[0], angles),
+            ring_points(width, height, inset[1], angles),
+        ),
+        axis=1,
+    )
+    out.flags.writeable = False
+    return out
+
+
+@lru_cache(maxsize=16)
+def polygons(width, height, inset, start, stop, step, opening):
+    """Vertices of polygons along a ring
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    inset: tuple of float
+        Insets of the outer and inner sides, in percentage of the
+        screen size
+    start: float
+        Starting angle of the first polygon, in degree
+    stop: float
+        Angle after the last polygon, in degree (excluded)
+    step: float
+        Angle between the starts of two polygons, in degree
+    opening: float
+        Opening angle of each polygon, in degree
+
+    Returns
+    -------
+    angles: np.array
+        Read-only array with the starting angle of each polygon
+    vertices: np.array
+        Read-only array of shape (N, 4, 2) with their vertices
+    """
+    angles = np.arange(start, stop, step)
+    vertices = np.stack(
+        (
+            ring_points(width, height, inset[0], angles),
+            ring_points(width, height, inset[0], angles + opening),
+            ring_points(width, height, inset[1], angles + opening),
+            ring_points(width, height, inset[1], angles),
+        ),
+        axis=1,
+    )
+    angles.flags.writeable = False
+    vertices.flags.writeable = False
+    return angles, vertices
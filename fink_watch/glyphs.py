@@ -0,0 +1,226 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Pre-rasterized glyphs for the text of the watch"""
+
+import math
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+from fink_watch.observatory import observatories
+
+FONT_PATH = "fonts/DS-DIGIB.TTF"
+
+# Everything the clock and the counter can display
+DEFAULT_CHARSET = "0123456789:.-KM"
+
+
+@lru_cache(maxsize=None)
+def load_font(size, path=FONT_PATH):
+    """Load a TrueType font once per size
+
+    Parameters
+    ----------
+    size: int
+        Font size in pixels
+    path: str
+        Path to the font file. Default is `FONT_PATH`
+
+    Returns
+    -------
+    out: FreeTypeFont
+    """
+    return ImageFont.truetype(path, size)
+
+
+class GlyphAtlas:
+    """Alpha masks of glyphs and words for one font size
+
+    Masks are rasterized once by FreeType, and text is then composed
+    by pasting them on the image. Unknown characters are rasterized on
+    first use and kept in the atlas.
+
+    Parameters
+    ----------
+    size: int
+        Font size in pixels
+    charset: str
+        Characters to pre-rasterize. Default is `DEFAULT_CHARSET`
+    words: list of str
+        Words to pre-rasterize as a whole (e.g. observatory names)
+    path: str
+        Path to the font file. Default is `FONT_PATH`
+    """
+
+    def __init__(self, size, charset=DEFAULT_CHARSET, words=(), path=FONT_PATH):
+        self.font = load_font(size, path)
+        self.glyphs = {}
+        for text in list(charset) + list(words):
+            self.glyph(text)
+
+    def glyph(self, text):
+        """Return the rasterized `text`
+
+        Parameters
+        ----------
+        text: str
+            Character or word
+
+        Returns
+        -------
+        out: tuple
+            (mask, dx, dy, advance, top), where the mask is an `L`
+            image (None if there is no ink), (dx, dy) the offset of its
+            upper left corner with respect to the pen position on the
+            baseline, advance the horizontal advance in pixels, and top
+            the ascent given by the font metrics (negative).
+        """
+        if text not in self.glyphs:
+            advance = self.font.getlength(text)
+            top = self.font.getbbox(text, anchor="ls")[1]
+            pad = self.font.size
+            canvas = Image.new("L", (int(math.ceil(advance)) + 2 * pad, 3 * pad), 0)
+            ImageDraw.Draw(canvas).text(
+                (pad, 2 * pad), text, font=self.font, anchor="ls", fill=255
+            )
+            bbox = canvas.getbbox()
+            if bbox is None:
+                self.glyphs[text] = (None, 0, 0, advance, top)
+            else:
+                self.glyphs[text] = (
+                    canvas.crop(bbox),
+                    bbox[0] - pad,
+                    bbox[1] - 2 * pad,
+                    advance,
+                    top,
+                )
+        return self.glyphs[text]
+
+    def layout(self, text):
+        """Split `text` into known glyphs, and place them on the baseline
+
+        Parameters
+        ----------
+        text: str
+            Text to compose
+
+        Returns
+        -------
+        out: tuple
+            (items, advance, top), where items is a list of
+            (mask, x, y) relative to the start of the baseline, advance
+            the total advance, and top the highest ascent.
+        """
+        parts = [text] if text in self.glyphs else list(text)
+        items = []
+        pen = 0.0
+        top = 0
+        for part in parts:
+            mask, dx, dy, advance, ascent = self.glyph(part)
+            if mask is not None:
+                items.append((mask, int(pen) + dx, dy))
+                top = min(top, ascent)
+            pen += advance
+        return items, pen, top
+
+    def place(self, xy, text, anchor="mt"):
+        """Position of the glyphs of `text` on the image
+
+        Parameters
+        ----------
+        xy: tuple of float
+            Anchor coordinates
+        text: str
+            Text to place
+        anchor: str
+            Horizontal (l, m, r) and vertical (t, s) anchor, with the
+            same meaning as for `ImageDraw.text`. Default is mt
+
+        Returns
+        -------
+        out: list of tuple
+            (mask, x, y) with the upper left corner of each mask
+        """
+        items, advance, top = self.layout(text)
+        horizontal, vertical = anchor
+        x = xy[0] - {"l": 0, "m": advance / 2, "r": advance}[horizontal]
+        y = xy[1] - {"t": top, "s": 0}[vertical]
+        # Half pixels are rounded down, as FreeType does
+        x = int(math.ceil(x - 0.5))
+        y = int(math.ceil(y - 0.5))
+        return [(mask, x + dx, y + dy) for mask, dx, dy in items]
+
+    def bbox(self, xy, text, anchor="mt"):
+        """Bounding box of the ink of `text`
+
+        Parameters
+        ----------
+        xy: tuple of float
+            Anchor coordinates
+        text: str
+            Text to place
+        anchor: str
+            See `place`. Default is mt
+
+        Returns
+        -------
+        out: tuple of int
+            (x0, y0, x1, y1), with exclusive ends, or None if there is
+            no ink
+        """
+        items = self.place(xy, text, anchor)
+        if not items:
+            return None
+        return (
+            min(x for _, x, _ in items),
+            min(y for _, _, y in items),
+            max(x + mask.width for mask, x, _ in items),
+            max(y + mask.height for mask, _, y in items),
+        )
+
+    def draw_text(self, image, xy, text, anchor="mt", fill=(255, 255, 255)):
+        """Paste `text` on `image`
+
+        Parameters
+        ----------
+        image: Image
+            Image to draw on
+        xy: tuple of float
+            Anchor coordinates
+        text: str
+            Text to draw
+        anchor: str
+            See `place`. Default is mt
+        fill: tuple
+            Color of the text. Default is white
+        """
+        for mask, x, y in self.place(xy, text, anchor):
+            image.paste(fill, (x, y), mask)
+
+
+@lru_cache(maxsize=16)
+def glyph_atlas(size):
+    """Atlas for the watch font, shared by all frames
+
+    Parameters
+    ----------
+    size: int
+        Font size in pixels
+
+    Returns
+    -------
+    out: GlyphAtlas
+    """
+    return GlyphAtlas(size, words=list(observatories.keys()))
@@ -0,0 +1,450 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Layout of the watch face, and its compilation for a resolution
+
+The face is described independently of the resolution: lengths are
+percentages of the screen width (x) or height (y), line widths are in
+pixels on a 240x240 screen, scaled with the smallest side, and colors
+are names in the palette, with an optional alpha. `compile_layout` resolves it
+once per resolution into flat lists of drawing commands, executed by
+`fink_watch.display`.
+
+Each element belongs to a layer:
+- background: rendered once, see `display.background_layer`
+- gauge: depends on the progression, see `display.gauge`
+- text: clock, counter, rate and stale marker, see `display.text_items`
+
+Rings are placed either with `inset` (distance from the border of the
+screen, for rings around its center), or with `center` and `radius`.
+Angles are in degree, from 3 o'clock and increasing clockwise. Texts
+are drawn with the `text` color of the palette, unless they set a
+color. The value `PROGRESSION` is replaced at runtime by the angle of the gauge.
+
+Arcs and gradients are drawn with `ImageDraw`, or with the rasterizer
+of `fink_watch.polar` if they set `"engine": "polar"`. The face does
+not use it: its edges differ from `ImageDraw` (e.g. ~370 pixels of the
+outer ring at 240x240), and the gauge arcs, drawn at every frame, are
+about twice slower with it.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+from fink_watch import geometry
+from fink_watch.colors import default_palette
+from fink_watch.utils import scale
+
+PROGRESSION = "progression"
+
+# Resolution for which the line widths are given
+REFERENCE_SIZE = 240
+
+FACE = (
+    # Outer ring
+    {
+        "layer": "background",
+        "kind": "arc",
+        "inset": 0,
+        "color": "dark_fink_orange",
+        "width": 4,
+    },
+    {
+        "layer": "background",
+        "kind": "gradient",
+        "inset": 0,
+        "colors": ("dark_blue", "light_blue"),
+        "angles0": (0, 80, 190, 250),
+        "angles": (60, 60, 30, 80),
+        "interval": 50,
+        "width": 5,
+    },
+    # Second ring, whose look comes from the overlap of the color steps
+    {
+        "layer": "background",
+        "kind": "gradient",
+        "inset": 4,
+        "colors": (("fink_orange", 120), ("fink_orange", 120)),
+        "angles0": (10, 60, 120, 180, 220, 260, 320),
+        "angles": (30, 40, 20, 30, 20, 30, 20),
+        "interval": 50,
+        "width": 5,
+    },
+    # Third ring
+    {
+        "layer": "background",
+        "kind": "arc",
+        "inset": 12.5,
+        "color": ("fink_orange", 120),
+        "width": 8,
+    },
+    # Ticks major/minor
+    {
+        "layer": "background",
+        "kind": "ticks",
+        "inset": (9.5, 12),
+        "angles": (90, 360, 10),
+        "width": 2,
+    },
+    {
+        "layer": "background",
+        "kind": "ticks",
+        "inset": (11.8, 12),
+        "angles": (90, 350, 2),
+        "width": 1,
+    },
+    # Inner rings
+    {
+        "layer": "background",
+        "kind": "halo",
+        "inset": 28,
+        "step": 0.2,
+        "count": 20,
+        "color": "dark_blue",
+        "width": 4,
+    },
+    {
+        "layer": "background",
+        "kind": "arc",
+        "inset": 27,
+        "start": 90,
+        "end": 360,
+        "color": "dark_fink_orange",
+        "width": 3,
+    },
+    # Text below the clock
+    {"layer": "background", "kind": "text", "text": "---", "size": 3, "x": 50, "y": 50},
+    {
+        "layer": "background",
+        "kind": "text",
+        "text": "{observatory}",
+        "size": 7,
+        "x": 50,
+        "y": 50,
+        "dy": 2 / 3,
+    },
+    # Counter
+    {
+        "layer": "background",
+        "kind": "disc",
+        "center": (75, 75),
+        "radius": 14,
+        "color": (0, 0, 0),
+    },
+    {
+        "layer": "background",
+        "kind": "halo",
+        "center": (75, 75),
+        "radius": 16,
+        "step": -0.2,
+        "count": 20,
+        "color": "dark_blue",
+        "width": 2,
+    },
+    # Polygons
+    {
+        "layer": "background",
+        "kind": "polygons",
+        "inset": (16.6, 25),
+        "angles": (90, 360, 10),
+        "opening": 7,
+        "color": ("polygon_color", 40),
+        "width": 2,
+    },
+    # Progression, on the third ring, the inner ring and the polygons
+    {
+        "layer": "gauge",
+        "kind": "arc",
+        "inset": 12.5,
+        "start": 90,
+        "end": PROGRESSION,
+        "color": "fink_orange",
+        "width": 8,
+    },
+    # Ticks slightly overlap the third ring: stamp them again on top
+    {"layer": "gauge", "kind": "ticks"},
+    {
+        "layer": "gauge",
+        "kind": "arc",
+        "inset": 27,
+        "start": 90,
+        "end": PROGRESSION,
+        "color": "fink_orange",
+        "width": 3,
+    },
+    {
+        "layer": "gauge",
+        "kind": "polygons",
+        "inset": (16.6, 25),
+        "angles": (90, 360, 10),
+        "until": PROGRESSION,
+        "opening": 7,
+        "color": ("polygon_color", 255),
+        "width": 2,
+    },
+    # Clock and counter
+    {
+        "layer": "text",
+        "kind": "text",
+        "text": "{clock}",
+        "size": 11,
+        "x": 50,
+        "y": 50,
+        "dy": -1,
+    },
+    {
+        "layer": "text",
+        "kind": "text",
+        "text": "{counter}",
+        "size": 10,
+        "x": 75,
+        "y": 75,
+        "dy": -1 / 3,
+    },
+    # Alerts per second, above the counter
+    {"layer": "text", "kind": "text", "text": "{rate}", "size": 4, "x": 75, "y": 65},
+    # Shown below the counter when it is not up to date
+    {"layer": "text", "kind": "text", "text": "{stale}", "size": 4, "x": 75, "y": 83},
+)
+
+Command = namedtuple("Command", ["op", "args"])
+DisplayList = namedtuple("DisplayList", ["background", "gauge", "text"])
+
+
+def resolve_color(color, palette):
+    """Color from the layout to RGB(A) tuple
+
+    Parameters
+    ----------
+    color: str, tuple
+        Name in the palette, (name, alpha), or RGB(A) tuple
+    palette: Palette
+        Colors of the watch face
+
+    Returns
+    -------
+    out: tuple of int
+    """
+    if isinstance(color, str):
+        return tuple(getattr(palette, color))
+    if isinstance(color[0], str):
+        return (*getattr(palette, color[0]), color[1])
+    return tuple(color)
+
+
+def line_width(element, width, height):
+    """Width of the lines of an element, in pixels, for a resolution"""
+    return max(1, round(element["width"] * min(width, height) / REFERENCE_SIZE))
+
+
+def bounding_box(element, width, height, inset=None, radius=None):
+    """Bounding box of a ring, from its inset or its center and radius"""
+    if "inset" in element:
+        inset = element["inset"] if inset is None else inset
+        return (
+            scale(width, inset),
+            scale(height, inset),
+            width - scale(width, inset),
+            height - scale(height, inset),
+        )
+    radius = element["radius"] if radius is None else radius
+    cx = scale(width, element["center"][0])
+    cy = scale(height, element["center"][1])
+    rx = scale(width, radius)
+    ry = scale(height, radius)
+    return (cx - rx, cy - ry, cx + rx, cy + ry)
+
+
+def compile_face(face, width, height, observatory, palette=default_palette):
+    """Resolve a face for a resolution
+
+    Parameters
+    ----------
+    face: list of dict
+        Layout, see `FACE`
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    observatory: str
+        Name of the observatory
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+
+    Returns
+    -------
+    out: DisplayList
+        Lists of `Command` per layer. The text commands of the text
+        layer hold templates for the clock, the counter, the rate and
+        the stale marker, see `display.text_items`.
+    """
+    layers = {"background": [], "gauge": [], "text": []}
+    ticks = []
+
+    for element in face:
+        commands = layers[element["layer"]]
+        kind = element["kind"]
+        engine = element.get("engine", "draw")
+
+        if kind == "arc":
+            commands.append(
+                Command(
+                    "polar_arc" if engine == "polar" else "arc",
+                    (
+                        bounding_box(element, width, height),
+                        element.get("start", 0),
+                        element.get("end", 360),
+                        resolve_color(element["color"], palette),
+                        line_width(element, width, height),
+                    ),
+                )
+            )
+        elif kind == "gradient":
+            commands.append(
+                Command(
+                    "polar_gradient" if engine == "polar" else "gradient",
+                    (
+                        bounding_box(element, width, height),
+                        resolve_color(element["colors"][0], palette),
+                        resolve_color(element["colors"][1], palette),
+                        element["angles0"],
+                        element["angles"],
+                        element["interval"],
+                        line_width(element, width, height),
+                    ),
+                )
+            )
+        elif kind == "halo":
+            # Concentric rings, more opaque in the middle
+            color = resolve_color(element["color"], palette)
+            for i in range(element["count"]):
+                transparency = int(255 / (abs(i - element["count"] // 2) + 1))
+                if "inset" in element:
+                    box = bounding_box(
+                        element,
+                        width,
+                        height,
+                        inset=element["inset"] + i * element["step"],
+                    )
+                else:
+                    box = bounding_box(
+                        element,
+                        width,
+                        height,
+                        radius=element["radius"] + i * element["step"],
+                    )
+                commands.append(
+                    Command(
+                        "arc",
+                        (
+                            box,
+                            0,
+                            360,
+                            (*color, transparency),
+                            line_width(element, width, height),
+                        ),
+                    )
+                )
+        elif kind == "disc":
+            commands.append(
+                Command(
+                    "circle",
+                    (
+                        (
+                            scale(width, element["center"][0]),
+                            scale(height, element["center"][1]),
+                        ),
+                        scale(width, element["radius"]),
+                        resolve_color(element["color"], palette),
+                    ),
+                )
+            )
+        elif kind == "ticks":
+            if "inset" in element:
+                segments = geometry.ticks(
+                    width, height, element["inset"], *element["angles"]
+                )
+                ticks.append((segments, line_width(element, width, height)))
+            # All the ticks share one mask, see below
+            commands.append(Command("ticks", ()))
+        elif kind == "polygons":
+            angles, vertices = geometry.polygons(
+                width, height, element["inset"], *element["angles"], element["opening"]
+            )
+            commands.append(
+                Command(
+                    "polygons",
+                    (
+                        angles,
+                        [polygon.ravel().tolist() for polygon in vertices],
+                        element.get("until"),
+                        resolve_color(element["color"], palette),
+                        line_width(element, width, height),
+                    ),
+                )
+            )
+        elif kind == "text":
+            size = scale(width, element["size"])
+            xy = (
+                scale(width, element["x"]),
+                scale(height, element["y"]) + element.get("dy", 0) * size,
+            )
+            if element["layer"] == "text":
+                text = element["text"]
+            else:
+                text = element["text"].format(observatory=observatory)
+            color = resolve_color(element.get("color", "text"), palette)
+            commands.append(Command("text", (int(size), xy, text, color)))
+        else:
+            raise ValueError("Unknown element in the layout: {}".format(kind))
+
+    # Ticks are drawn once in a mask, and pasted by each `ticks` command
+    mask = Image.new("L", (width, height), 0)
+    draw = ImageDraw.Draw(mask)
+    for segments, thickness in ticks:
+        for tick in segments:
+            draw.line(tick.ravel().tolist(), fill=255, width=thickness)
+    for layer in ("background", "gauge"):
+        layers[layer] = [
+            Command("mask", (mask, (255, 255, 255)))
+            if command.op == "ticks"
+            else command
+            for command in layers[layer]
+        ]
+
+    return DisplayList(layers["background"], layers["gauge"], layers["text"])
+
+
+@lru_cache(maxsize=8)
+def compile_layout(width, height, observatory, palette=default_palette):
+    """Display list of `FACE`, memoized per resolution
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    observatory: str
+        Name of the observatory
+    palette: Palette
+        Colors of the watch face. Default is `default_palette`
+
+    Returns
+    -------
+    out: DisplayList
+    """
+    return compile_face(FACE, width, height, observatory, palette)
@@ -26,29 +26,39 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import time
-import spidev
 import logging
 import numpy as np
-from gpiozero import DigitalOutputDevice, PWMOutputDevice, DigitalInputDevice
+from fink_watch.backends import HardwareBackend
 
 
 class RaspberryPi:
+    """SPI and GPIO access to the screen
+
+    `spi` is an SPI device, a (bus, device) tuple opened by the
+    backend, or None to send nothing. `backend` is a `HardwareBackend`
+    by default, see `fink_watch.backends` for a simulated screen.
+    """
+
     def __init__(
         self,
-        spi=spidev.SpiDev(0, 0),
+        spi=(0, 0),
         spi_freq=40000000,
+        spi_chunk=4096,
         rst=27,
         dc=25,
         bl=18,
         bl_freq=1000,
         i2c=None,
         i2c_freq=100000,
+        backend=None,
     ):
         self.np = np
+        self.backend = HardwareBackend() if backend is None else backend
         self.INPUT = False
         self.OUTPUT = True
 
         self.SPEED = spi_freq
+        self.SPI_CHUNK = spi_chunk
         self.BL_freq = bl_freq
 
         self.RST_PIN = self.gpio_mode(rst, self.OUTPUT)
@@ -57,6 +67,8 @@ class RaspberryPi:
         self.bl_DutyCycle(0)
 
         # Initialize SPI
+        if isinstance(spi, tuple):
+            spi = self.backend.spi(*spi)
         self.SPI = spi
         if self.SPI is not None:
             self.SPI.max_speed_hz = spi_freq
@@ -64,9 +76,9 @@ class RaspberryPi:
 
     def gpio_mode(self, Pin, Mode, pull_up=None, active_state=True):
         if Mode:
-            return DigitalOutputDevice(Pin, active_high=True, initial_value=False)
+            return self.backend.output(Pin)
         else:
-            return DigitalInputDevice(Pin, pull_up=pull_up, active_state=active_state)
+            return self.backend.input(Pin, pull_up=pull_up, active_state=active_state)
 
     def digital_write(self, Pin, value):
         if value:
@@ -81,11 +93,27 @@ class RaspberryPi:
         time.sleep(delaytime / 1000.0)
 
     def gpio_pwm(self, Pin):
-        return PWMOutputDevice(Pin, frequency=self.BL_freq)
+        return self.backend.pwm(Pin, frequency=self.BL_freq)
 
     def spi_writebyte(self, data):
+        if isinstance(data, list):
+            if self.SPI is not None:
+                self.SPI.writebytes(data)
+        else:
+            self.spi_writebuffer(data)
+
+    def spi_writebuffer(self, data):
+        """Write a buffer without converting it to a list
+
+        Parameters
+        ----------
+        data: bytes, bytearray, memoryview or np.array
+            Contiguous buffer, sent in chunks of `spi_chunk` bytes
+        """
         if self.SPI is not None:
-            self.SPI.writebytes(data)
+            view = memoryview(data).cast("B")
+            for i in range(0, len(view), self.SPI_CHUNK):
+                self.SPI.writebytes2(view[i : i + self.SPI_CHUNK])
 
     def bl_DutyCycle(self, duty):
         self.BL_PIN.value = duty / 100
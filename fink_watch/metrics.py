@@ -0,0 +1,251 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Timings and counters of the main loop
+
+Stages are timed with the monotonic clock, and the last durations are
+kept to compute the percentiles when reporting. Gauges keep the last
+value of a quantity, e.g. the rate of alerts. Reports are a log line
+(logfmt) and, optionally, a file in the Prometheus text format, e.g.
+for the textfile collector of the node exporter.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95)
+
+
+class Metrics:
+    """Stage timers, counters and gauges, shared between threads
+
+    Parameters
+    ----------
+    path: str
+        Prometheus text file, re-written at each report. Default is
+        None, meaning only log the metrics
+    every: float
+        Time between two reports, in seconds, see `tick`. Default
+        is 60
+    window: int
+        Number of durations kept per stage for the percentiles.
+        Default is 1024
+    """
+
+    def __init__(self, path=None, every=60.0, window=1024):
+        self.path = path
+        self.every = every
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._count = {}
+        self._sum = {}
+        self.counters = {}
+        self.gauges = {}
+        self._last_report = time.monotonic()
+
+    @contextmanager
+    def time(self, stage):
+        """Time a block of code
+
+        Parameters
+        ----------
+        stage: str
+            Name of the stage, e.g. poll or render
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, duration):
+        """Record the duration of a stage
+
+        Parameters
+        ----------
+        stage: str
+            Name of the stage
+        duration: float
+            Duration in seconds
+        """
+        with self._lock:
+            if stage not in self._durations:
+                self._durations[stage] = deque(maxlen=self.window)
+                self._count[stage] = 0
+                self._sum[stage] = 0.0
+            self._durations[stage].append(duration)
+            self._count[stage] += 1
+            self._sum[stage] += duration
+
+    def count(self, name, value=1):
+        """Increment a counter
+
+        Parameters
+        ----------
+        name: str
+            Name of the counter, e.g. bytes_sent
+        value: int
+            Increment. Default is 1
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value, **labels):
+        """Set the value of a gauge
+
+        Parameters
+        ----------
+        name: str
+            Name of the gauge, e.g. alerts_per_second
+        value: float
+            Current value
+        **labels: str
+            Labels telling apart the gauges of the same name, e.g.
+            topic
+        """
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def _gauges(self):
+        """Copy of the gauges, sorted by name and labels"""
+        with self._lock:
+            return sorted(self.gauges.items())
+
+    def summary(self):
+        """Percentiles of the last durations, and counters
+
+        Returns
+        -------
+        stages: dict
+            For each stage, a dict with p50, p95 and max of the last
+            durations (seconds), and count and sum since the start
+        counters: dict
+            Value of the counters since the start
+        """
+        with self._lock:
+            durations = {k: np.array(v) for k, v in self._durations.items()}
+            counts = dict(self._count)
+            sums = dict(self._sum)
+            counters = dict(self.counters)
+
+        stages = {}
+        for stage, values in durations.items():
+            p50, p95 = np.quantile(values, QUANTILES)
+            stages[stage] = {
+                "p50": float(p50),
+                "p95": float(p95),
+                "max": float(values.max()),
+                "count": counts[stage],
+                "sum": sums[stage],
+            }
+        return stages, counters
+
+    def log(self):
+        """Log the metrics on one line, as key=value pairs"""
+        stages, counters = self.summary()
+        fields = []
+        for stage, values in sorted(stages.items()):
+            for key in ["p50", "p95", "max"]:
+                fields.append("{}_{}_ms={:.2f}".format(stage, key, values[key] * 1e3))
+        for name, value in sorted(counters.items()):
+            fields.append("{}={}".format(name, value))
+        for (name, labels), value in self._gauges():
+            key = "_".join([name] + [v for _, v in labels])
+            fields.append("{}={:.2f}".format(key, value))
+        logging.info("metrics {}".format(" ".join(fields)))
+
+    def prometheus(self):
+        """Metrics in the Prometheus text format
+
+        Returns
+        -------
+        out: str
+        """
+        stages, counters = self.summary()
+        lines = [
+            "# HELP fink_watch_stage_seconds Duration of the stages of the main loop",
+            "# TYPE fink_watch_stage_seconds summary",
+        ]
+        for stage, values in sorted(stages.items()):
+            for quantile in QUANTILES:
+                lines.append(
+                    'fink_watch_stage_seconds{{stage="{}",quantile="{}"}} {:.6f}'.format(
+                        stage, quantile, values["p{:.0f}".format(quantile * 100)]
+                    )
+                )
+            lines.append(
+                'fink_watch_stage_seconds_sum{{stage="{}"}} {:.6f}'.format(
+                    stage, values["sum"]
+                )
+            )
+            lines.append(
+                'fink_watch_stage_seconds_count{{stage="{}"}} {}'.format(
+                    stage, values["count"]
+                )
+            )
+        lines.append(
+            "# HELP fink_watch_stage_seconds_max Longest of the last durations"
+        )
+        lines.append("# TYPE fink_watch_stage_seconds_max gauge")
+        for stage, values in sorted(stages.items()):
+            lines.append(
+                'fink_watch_stage_seconds_max{{stage="{}"}} {:.6f}'.format(
+                    stage, values["max"]
+                )
+            )
+        for name, value in sorted(counters.items()):
+            lines.append("# TYPE fink_watch_{}_total counter".format(name))
+            lines.append("fink_watch_{}_total {}".format(name, value))
+        declared = set()
+        for (name, labels), value in self._gauges():
+            if name not in declared:
+                lines.append("# TYPE fink_watch_{} gauge".format(name))
+                declared.add(name)
+            selector = ",".join('{}="{}"'.format(k, v) for k, v in labels)
+            lines.append(
+                "fink_watch_{}{{{}}} {:.6f}".format(name, selector, value)
+                if selector
+                else "fink_watch_{} {:.6f}".format(name, value)
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Write the Prometheus file, atomically"""
+        tmp = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, self.path)
+
+    def report(self):
+        """Log the metrics, and write the Prometheus file if any"""
+        self.log()
+        if self.path is not None:
+            try:
+                self.write()
+            except OSError as e:
+                logging.warning("Cannot write the metrics: {}".format(e))
+        self._last_report = time.monotonic()
+
+    def tick(self):
+        """Report if the last report is older than `every` seconds"""
+        if time.monotonic() >= self._last_report + self.every:
+            self.report()
@@ -0,0 +1,174 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Vectorized rasterization of arcs and rings
+
+Arcs are painted on an RGB array by selecting pixels from per-pixel
+angle and radius maps, with colors from a lookup table, instead of one
+`ImageDraw.arc` call per color step. Angles are in degree, measured from
+3 o'clock and increasing clockwise, as for `ImageDraw.arc`.
+
+Pixels belong to a ring by their distance to the center, so the edges
+are not exactly the ones of `ImageDraw.arc`: for the outer ring of the
+face, about 370 pixels differ at 240x240, on its inner and outer edges.
+It pays off for rings of many color steps (the outer gradient ring takes
+2.3 ms instead of 36 ms), not for plain arcs: the gauge arcs take 1.3 to
+1.8 ms per frame instead of 0.6 to 0.9 ms at 240x240, because of the
+copies between the image and the array. The layout uses it only on the
+elements with `"engine": "polar"`, see `fink_watch.layout`.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from fink_watch.utils import interpolate
+
+
+@lru_cache(maxsize=16)
+def polar_maps(width, height, cx, cy):
+    """Angle and radius of each pixel with respect to a center
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    cx: float
+        Horizontal position of the center, in pixels
+    cy: float
+        Vertical position of the center, in pixels
+
+    Returns
+    -------
+    angle: np.array
+        Angles in [0, 360) degree, of shape (height, width)
+    radius: np.array
+        Distances to the center in pixels, of shape (height, width)
+    """
+    y, x = np.mgrid[0:height, 0:width]
+    dx = x - cx
+    dy = y - cy
+    angle = np.rad2deg(np.arctan2(dy, dx)) % 360
+    radius = np.hypot(dx, dy)
+    angle.flags.writeable = False
+    radius.flags.writeable = False
+    return angle, radius
+
+
+def ring_pixels(shape, coord, width):
+    """Pixels of a ring
+
+    Parameters
+    ----------
+    shape: tuple of int
+        (height, width) of the image
+    coord: list of 4 float
+        Bounding box of the circle: [x0, y0, x1, y1]
+    width: int
+        Width of the ring, in pixels, towards the center
+
+    Returns
+    -------
+    index: np.array
+        Flat indices of the pixels of the ring
+    angle: np.array
+        Angle of these pixels, in [0, 360) degree
+    """
+    x0, y0, x1, y1 = coord
+    angle, radius = polar_maps(shape[1], shape[0], (x0 + x1) / 2, (y0 + y1) / 2)
+    outer = (x1 - x0) / 2
+    index = np.flatnonzero((radius <= outer + 0.5) & (radius > outer - width + 0.5))
+    return index, angle.ravel()[index]
+
+
+def blend(array, index, color):
+    """Paint a color on some pixels
+
+    Parameters
+    ----------
+    array: np.array
+        RGB image, of shape (height, width, 3) and type uint8
+    index: np.array
+        Flat indices of the pixels to paint
+    color: tuple or np.array
+        RGB or RGBA color, or array of colors (one per pixel) of shape
+        (N, 3 or 4)
+    """
+    flat = array.reshape(-1, 3)
+    color = np.asarray(color, dtype=np.uint16)
+    alpha = color[..., 3:4] if color.shape[-1] == 4 else np.uint16(255)
+    pixels = flat[index].astype(np.uint16)
+    flat[index] = (color[..., :3] * alpha + pixels * (255 - alpha) + 127) // 255
+
+
+def draw_arc(array, coord, start, end, fill, width=1):
+    """Equivalent of `ImageDraw.arc` on an RGB array
+
+    Parameters
+    ----------
+    array: np.array
+        RGB image, of shape (height, width, 3) and type uint8
+    coord: list of 4 float
+        Bounding box of the circle: [x0, y0, x1, y1]
+    start: float
+        Starting angle, in degree
+    end: float
+        Ending angle, in degree
+    fill: tuple
+        RGB or RGBA color
+    width: int
+        Width of the arc, in pixels. Default is 1
+    """
+    index, angle = ring_pixels(array.shape[:2], coord, width)
+    if end - start < 360:
+        index = index[(angle - start) % 360 < (end - start) % 360]
+    blend(array, index, fill)
+
+
+def draw_arcs_with_gradient(
+    array, coord, f_co, t_co, angles0, angles, interval=20, width=5
+):
+    """Vectorized version of `utils.draw_arcs_with_gradient`
+
+    Each pixel is painted once, so translucent colors do not pile up
+    where consecutive steps overlap, as they do with `ImageDraw.arc`.
+
+    Parameters
+    ----------
+    array: np.array
+        RGB image, of shape (height, width, 3) and type uint8
+    coord: list of 4 float
+        Two points to define the bounding box: [x0, y0, x1, y1]
+    f_co: list of 3 or 4 int
+        Starting RGB(A) tuple
+    t_co: list of 3 or 4 int
+        Ending RGB(A) tuple
+    angles0: list of float
+        Starting angles of the arcs, in degree
+    angles: list of float
+        Opening angles for arcs, in degree
+    interval: int
+        Interval between steps, for the color interpolation
+    width: int
+        Width of the arc, in pixels
+    """
+    lut = np.array(list(interpolate(f_co, t_co, interval)), dtype=np.uint16)
+    index, angle = ring_pixels(array.shape[:2], coord, width)
+    for angle0, opening in zip(angles0, angles):
+        offset = (angle - angle0) % 360
+        selection = offset < opening
+        step = (offset[selection] * interval / opening).astype(np.int64)
+        blend(array, index[selection], lut[np.minimum(step, interval - 1)])
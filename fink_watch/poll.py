@@ -14,12 +14,355 @@
 # limitations under the License.
 """Get last alert offset"""
 
+import concurrent.futures
+import logging
+import threading
+import time
+from collections import namedtuple
+
 import confluent_kafka
+import confluent_kafka.admin
+
+from fink_watch.rate import AdaptiveInterval, RateEstimator
+
+Watermarks = namedtuple("Watermarks", ["total", "partitions"])
+Snapshot = namedtuple("Snapshot", ["value", "totals", "rates", "updated", "error"])
+
+
+class OffsetTracker:
+    """Last offsets of topics, polled over one long-lived connection
+
+    The high watermarks of all the partitions of all the topics are
+    queried at once with the admin client (ListOffsets), so a poll is
+    a single round-trip per broker, whatever the number of topics and
+    partitions, bounded by one overall deadline. No consumer is
+    created, so no consumer group is ever joined. The partitions of the
+    topics are cached, and refreshed every `refresh` seconds or after
+    an error.
+
+    Topics that do not exist (yet), as nightly topics, are reported in
+    `errors` and have no watermarks, while the other topics are still
+    polled. They are checked again at each refresh.
+
+    Parameters
+    ----------
+    kafka_config: dict
+        Kafka client config. Consumer properties, as `group.id`, are
+        not needed and ignored.
+    topics: str or list of str
+        Topic name(s)
+    timeout: float
+        Deadline of a poll, including the update of the partitions
+        when due, in seconds. Default is 1
+    refresh: float
+        Time between two updates of the partitions, in seconds.
+        Default is 60
+    """
+
+    def __init__(self, kafka_config, topics, timeout=1.0, refresh=60.0):
+        if isinstance(topics, str):
+            topics = [topics]
+        self.topics = tuple(topics)
+        self.timeout = timeout
+        self.refresh = refresh
+
+        config = {
+            k: v
+            for k, v in kafka_config.items()
+            if k not in ["group.id", "enable.auto.commit", "auto.offset.reset"]
+        }
+        self.client = confluent_kafka.admin.AdminClient(config)
+        self.partitions = None
+        self.errors = {}
+        self._updated = None
+
+    def _timed_out(self):
+        """Error of a poll past its deadline"""
+        return confluent_kafka.KafkaException(
+            confluent_kafka.KafkaError(
+                confluent_kafka.KafkaError._TIMED_OUT,
+                "No watermarks after {} s".format(self.timeout),
+            )
+        )
+
+    def update_partitions(self, deadline=None):
+        """Fetch the partitions of the topics
+
+        Raises KafkaException if none of the topics is available, or if
+        the deadline is reached.
+
+        Parameters
+        ----------
+        deadline: float
+            Time from `time.monotonic` by which all the topics must be
+            fetched. Default is None, meaning `timeout` from now
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout
+        partitions = []
+        errors = {}
+        for topic in self.topics:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._timed_out()
+            metadata = self.client.list_topics(topic, timeout=remaining)
+            error = metadata.topics[topic].error
+            if error is not None:
+                errors[topic] = error
+                if str(error) != str(self.errors.get(topic)):
+                    logging.warning("Topic {} not polled: {}".format(topic, error))
+                continue
+            partitions += [
+                (topic, p) for p in sorted(metadata.topics[topic].partitions)
+            ]
+
+        self.errors = errors
+        if len(errors) == len(self.topics):
+            raise confluent_kafka.KafkaException(errors[self.topics[0]])
+        self.partitions = partitions
+        self._updated = time.monotonic()
+
+    def watermarks(self):
+        """High watermark of each partition, per topic
+
+        Returns
+        -------
+        out: dict
+            Watermarks for each topic, in the order of `topics`: total,
+            the sum over the partitions, and partitions, a dict with
+            the high watermark of each partition. None for the topics
+            in `errors`.
+        """
+        deadline = time.monotonic() + self.timeout
+        if self.partitions is None or time.monotonic() > self._updated + self.refresh:
+            self.update_partitions(deadline)
+
+        latest = confluent_kafka.admin.OffsetSpec.latest()
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise concurrent.futures.TimeoutError()
+            futures = self.client.list_offsets(
+                {
+                    confluent_kafka.TopicPartition(topic, p): latest
+                    for topic, p in self.partitions
+                },
+                request_timeout=remaining,
+            )
+            partitions = {topic: {} for topic in self.topics}
+            for tp, future in futures.items():
+                remaining = max(deadline - time.monotonic(), 0)
+                offset = future.result(timeout=remaining).offset
+                partitions[tp.topic][tp.partition] = offset
+        except concurrent.futures.TimeoutError:
+            self.partitions = None
+            raise self._timed_out()
+        except confluent_kafka.KafkaException:
+            # e.g. partitions changed: fetch them again on the next poll
+            self.partitions = None
+            raise
+        return {
+            topic: None
+            if topic in self.errors
+            else Watermarks(sum(values.values()), values)
+            for topic, values in partitions.items()
+        }
+
+    def totals(self):
+        """Last offset of each topic
+
+        Returns
+        -------
+        out: tuple of int
+            Sum of the high watermarks of the partitions, for each
+            topic in the order of `topics`, or None for the topics in
+            `errors`
+        """
+        return tuple(
+            w.total if w is not None else None for w in self.watermarks().values()
+        )
+
+    def poll(self):
+        """Return the last offset
+
+        Returns
+        -------
+        offset: int
+            Sum of the high watermarks of the partitions of all the
+            available topics
+        """
+        return sum(total for total in self.totals() if total is not None)
+
+    def close(self):
+        """Nothing to close: the connection ends with the client"""
+        self.client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Poller:
+    """Poll the last offset in a background thread
+
+    The result of each poll is published as an immutable `Snapshot`
+    (last value over all the available topics, tuple of the values of
+    each topic of the tracker, or None for a missing topic, tuple of
+    their rates in alerts per second, or None when unknown, time of the last successful poll, error of the last
+    poll or None), replaced as a whole, so that readers never wait for
+    Kafka nor take a lock. Errors do not stop the thread: the previous
+    value is kept, and polling goes on.
+
+    The time between two polls adapts to the activity, see
+    `rate.AdaptiveInterval`: from `interval` while alerts flow, up to
+    `max_interval` when the topics are idle. Failed polls are retried
+    with a backoff of their own.
+
+    Parameters
+    ----------
+    tracker: OffsetTracker
+        Used by the thread only
+    interval: float
+        Shortest time between the start of two polls, in seconds.
+        Default is 1
+    max_interval: float
+        Longest time between the start of two polls, in seconds.
+        Default is None, meaning `interval` (no adaptation)
+    max_retry: float
+        Longest time between two failed polls, in seconds. Default is
+        None, meaning `max_interval`
+    metrics: Metrics
+        Where to record the poll stage, the Kafka errors, and the mean
+        rate of alerts of each topic since the previous report of the
+        metrics. Default is None
+    """
+
+    def __init__(
+        self, tracker, interval=1.0, max_interval=None, max_retry=None, metrics=None
+    ):
+        self.tracker = tracker
+        if max_interval is None:
+            max_interval = interval
+        if max_retry is None:
+            max_retry = max_interval
+        self.schedule = AdaptiveInterval(interval, max_interval, max_retry=max_retry)
+        self.metrics = metrics
+        self.estimators = [RateEstimator() for _ in tracker.topics]
+        # Interval scheduled after the last successful poll
+        self._expected = self.schedule.current
+
+        self.snapshot = Snapshot(None, None, None, None, None)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="poller", daemon=True)
+
+    def start(self):
+        """Start the thread"""
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the thread, and close the tracker once stopped
+
+        Parameters
+        ----------
+        timeout: float
+            Maximum time to wait, in seconds. Default is None, meaning
+            no limit
+        """
+        self._stopping.set()
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.tracker.close()
+
+    def age(self):
+        """Time since the last successful poll, in seconds
+
+        Returns
+        -------
+        out: float
+            Infinite if no poll succeeded yet
+        """
+        updated = self.snapshot.updated
+        if updated is None:
+            return float("inf")
+        return time.monotonic() - updated
+
+    def stale(self, after):
+        """Whether the last value is older than expected
+
+        The next poll was expected one interval after the last
+        successful one, the interval in force at that time: retries
+        after failures do not push it back.
+
+        Parameters
+        ----------
+        after: float
+            Tolerated delay after the scheduled poll, in seconds
+
+        Returns
+        -------
+        out: bool
+        """
+        return self.age() > after + self._expected
+
+    def _poll(self):
+        """Poll once, and tell whether new alerts came (None if failed)"""
+        start = time.monotonic()
+        try:
+            totals = self.tracker.totals()
+        except Exception as e:
+            previous = self.snapshot
+            # Log once per kind of error, not at every poll
+            if str(e) != str(previous.error):
+                logging.warning("Poll failed, keeping the last value: {}".format(e))
+            if self.metrics is not None:
+                self.metrics.count("kafka_errors")
+            self.snapshot = previous._replace(error=e)
+            return None
+        now = time.monotonic()
+        if self.metrics is not None:
+            self.metrics.observe("poll", now - start)
+
+        previous = self.snapshot
+        if previous.error is not None:
+            logging.info("Poll succeeded again")
+        for topic, estimator, total in zip(
+            self.tracker.topics, self.estimators, totals
+        ):
+            if total is None:
+                continue
+            estimator.add(now, total)
+            if self.metrics is not None:
+                rate = estimator.windowed(self.metrics.every)
+                if rate is not None:
+                    self.metrics.gauge("alerts_per_second", rate, topic=topic)
+        rates = tuple(
+            estimator.rate if total is not None else None
+            for estimator, total in zip(self.estimators, totals)
+        )
+        value = sum(total for total in totals if total is not None)
+        self.snapshot = Snapshot(value, totals, rates, now, None)
+        return value != previous.value
+
+    def _run(self):
+        while not self._stopping.is_set():
+            start = time.monotonic()
+            active = self._poll()
+            if active is None:
+                interval = self.schedule.retry()
+            else:
+                interval = self._expected = self.schedule.update(active)
+            self._stopping.wait(max(interval - (time.monotonic() - start), 0))
 
 
 def poll_last_offset(kafka_config, topic):
     """Return the last offset
 
+    It opens and closes a connection: use `OffsetTracker` to poll
+    repeatedly.
+
     Parameters
     ----------
     kafka_config: dict
@@ -32,24 +375,5 @@ def poll_last_offset(kafka_config, topic):
     offsets: list
         Last offset
     """
-    consumer = confluent_kafka.Consumer(kafka_config)
-    topics = ["{}".format(topic)]
-    consumer.subscribe(topics)
-
-    metadata = consumer.list_topics(topic)
-    if metadata.topics[topic].error is not None:
-        raise confluent_kafka.KafkaException(metadata.topics[topic].error)
-
-    # List of partitions
-    partitions = [
-        confluent_kafka.TopicPartition(topic, p)
-        for p in metadata.topics[topic].partitions
-    ]
-    committed = consumer.committed(partitions)
-    offset = 0
-    for partition in committed:
-        _, hi = consumer.get_watermark_offsets(partition, timeout=1, cached=False)
-        offset += hi
-
-    consumer.close()
-    return offset
+    with OffsetTracker(kafka_config, [topic]) as tracker:
+        return tracker.poll()
@@ -0,0 +1,176 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Rate of incoming alerts, and polling interval following it"""
+
+import numpy as np
+
+
+class RateEstimator:
+    """Alerts per second, from the successive offsets of a topic
+
+    The last (time, offset) samples are kept in a fixed-size ring
+    buffer. Two estimators are available: an exponentially weighted
+    moving average of the rate between consecutive samples, weighted
+    by the time between them (so irregular polls are fine), and the
+    mean rate over a time window.
+
+    Parameters
+    ----------
+    size: int
+        Number of samples kept. Default is 128
+    halflife: float
+        Half-life of the moving average, in seconds. Default is 30
+    """
+
+    def __init__(self, size=128, halflife=30.0):
+        self.size = size
+        self.halflife = halflife
+        self.times = np.zeros(size)
+        self.offsets = np.zeros(size, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        """Forget the samples"""
+        self.count = 0
+        self.head = 0
+        self.ewma = None
+
+    def add(self, now, offset):
+        """Add a sample
+
+        A decreasing offset (e.g. new topic for the night) starts the
+        estimation again.
+
+        Parameters
+        ----------
+        now: float
+            Time of the sample, from `time.monotonic`
+        offset: int
+            Last offset of the topic
+        """
+        if self.count > 0:
+            last = (self.head - 1) % self.size
+            elapsed = now - float(self.times[last])
+            if offset < self.offsets[last]:
+                self.reset()
+            elif elapsed > 0:
+                rate = (offset - int(self.offsets[last])) / elapsed
+                if self.ewma is None:
+                    self.ewma = rate
+                else:
+                    alpha = 1 - 0.5 ** (elapsed / self.halflife)
+                    self.ewma += alpha * (rate - self.ewma)
+
+        self.times[self.head] = now
+        self.offsets[self.head] = offset
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def windowed(self, window=60.0):
+        """Mean rate over the last samples
+
+        Parameters
+        ----------
+        window: float
+            Duration in seconds. If the window holds a single sample,
+            the one before is used. Default is 60
+
+        Returns
+        -------
+        out: float
+            Alerts per second, or None with less than two samples
+        """
+        if self.count < 2:
+            return None
+        index = (self.head - self.count + np.arange(self.count)) % self.size
+        times = self.times[index]
+        offsets = self.offsets[index]
+        first = min(np.searchsorted(times, times[-1] - window), self.count - 2)
+        return float((offsets[-1] - offsets[first]) / (times[-1] - times[first]))
+
+    @property
+    def rate(self):
+        """Moving average of the rate, in alerts per second, or None"""
+        return self.ewma
+
+
+class AdaptiveInterval:
+    """Time between two polls, following the activity of the topics
+
+    Polls are at the shortest interval as long as alerts flow. When
+    nothing comes, the interval grows geometrically up to the longest
+    one, and snaps back to the shortest as soon as alerts are seen
+    again.
+
+    Failed polls (e.g. broker unreachable, topic absent) do not change
+    this interval: they are retried with a shorter backoff of their
+    own, from the shortest interval up to `max_retry`, forgotten at the
+    next successful poll, so that the watch recovers quickly.
+
+    Parameters
+    ----------
+    minimum: float
+        Shortest interval, in seconds. Default is 1
+    maximum: float
+        Longest interval, in seconds. Default is 300
+    factor: float
+        Growth of the interval after each idle or failed poll.
+        Default is 2
+    max_retry: float
+        Longest interval after a failed poll, in seconds, capped by
+        `maximum`. Default is 30
+    """
+
+    def __init__(self, minimum=1.0, maximum=300.0, factor=2.0, max_retry=30.0):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.max_retry = min(max(max_retry, minimum), self.maximum)
+        self.factor = factor
+        self.current = minimum
+        self._retry = None
+
+    def update(self, active):
+        """Interval before the next poll, after a successful one
+
+        Parameters
+        ----------
+        active: bool
+            Whether new alerts came since the previous poll
+
+        Returns
+        -------
+        out: float
+            Interval in seconds
+        """
+        self._retry = None
+        if active:
+            self.current = self.minimum
+        else:
+            self.current = min(self.current * self.factor, self.maximum)
+        return self.current
+
+    def retry(self):
+        """Interval before the next poll, after a failed one
+
+        Returns
+        -------
+        out: float
+            Interval in seconds
+        """
+        if self._retry is None:
+            self._retry = self.minimum
+        else:
+            self._retry = min(self._retry * self.factor, self.max_retry)
+        return self._retry
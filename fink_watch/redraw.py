@@ -0,0 +1,120 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Redraw the screen only when what it shows changes"""
+
+import logging
+from collections import namedtuple
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from fink_watch.display import format_counter, format_rate, progression_angle
+from fink_watch.observatory import observatories
+
+VisibleState = namedtuple(
+    "VisibleState",
+    ["page", "observatory", "clock", "counter", "gauge_deg", "rate", "stale"],
+)
+
+# The logo does not change
+LOGO = VisibleState("logo", None, None, None, None, None, False)
+
+
+def visible_state(
+    progression, observatory, alert_per_deg=1000, now=None, stale=False, rate=None
+):
+    """Everything the watch face shows, for a given number of alerts
+
+    Two frames with the same state are identical on screen.
+
+    Parameters
+    ----------
+    progression: int
+        Number of incoming alerts
+    observatory: str
+        Name of the observatory (local time)
+    alert_per_deg: int
+        Number of alerts per degree. Default is 1000
+    now: datetime
+        Time to display. Default is None, meaning the current time
+    stale: bool
+        Whether the counter is marked as not up to date. Default is
+        False
+    rate: float
+        Alerts per second. Default is None, meaning not shown
+
+    Returns
+    -------
+    out: VisibleState
+    """
+    if now is None:
+        now = datetime.now(tz=ZoneInfo(observatories[observatory]))
+    return VisibleState(
+        "watch",
+        observatory,
+        now.strftime("%H:%M"),
+        format_counter(progression),
+        progression_angle(progression, alert_per_deg),
+        format_rate(rate),
+        stale,
+    )
+
+
+class ChangeDetector:
+    """Keep track of what is on screen, to skip identical frames
+
+    The clock changes once a minute, and the counter and the gauge
+    often stay the same between two polls: rendering and sending such
+    frames is wasted work.
+    """
+
+    def __init__(self):
+        self.state = None
+        self.drawn = 0
+        self.skipped = 0
+
+    def changed(self, state):
+        """Whether a frame must be drawn for this state
+
+        A True answer means the caller draws it: the state is then
+        considered on screen.
+
+        Parameters
+        ----------
+        state: VisibleState
+            State of the next frame
+
+        Returns
+        -------
+        out: bool
+        """
+        if state == self.state:
+            self.skipped += 1
+            return False
+        self.state = state
+        self.drawn += 1
+        return True
+
+    def invalidate(self):
+        """Forget the state, e.g. when the screen is drawn elsewhere"""
+        self.state = None
+
+    def report(self):
+        """Log the number of frames drawn and skipped"""
+        total = max(self.drawn + self.skipped, 1)
+        logging.info(
+            "{} frames drawn, {} skipped ({:.0f}%)".format(
+                self.drawn, self.skipped, self.skipped / total * 100
+            )
+        )
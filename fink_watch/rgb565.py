@@ -0,0 +1,192 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Conversion of images to the RGB565 format of the screens"""
+
+import numpy as np
+
+
+def rgb565_lut(palette):
+    """Encode a palette
+
+    Parameters
+    ----------
+    palette: list of int
+        Flat list of RGB values, as returned by `Image.getpalette`
+
+    Returns
+    -------
+    out: np.array
+        Array of 256 uint16 RGB565 values (native byte order)
+    """
+    rgb = np.zeros((256, 3), dtype=np.uint16)
+    values = np.asarray(palette, dtype=np.uint16).reshape(-1, 3)[:256]
+    rgb[: len(values)] = values
+    return ((rgb[:, 0] & 0xF8) << 8) | ((rgb[:, 1] & 0xFC) << 3) | (rgb[:, 2] >> 3)
+
+
+def pack(img, out, scratch):
+    """Pack RGB values in RGB565, in preallocated arrays
+
+    It is not a single pass: masking, shifting and combining the
+    channels takes seven uint16 ufunc passes, all writing in `out` or
+    `scratch`, so that no temporary array is allocated.
+
+    Parameters
+    ----------
+    img: np.array
+        RGB or RGBA array of shape (height, width, 3 or 4)
+    out: np.array
+        uint16 output array of shape (height, width), native byte order
+    scratch: np.array
+        uint16 array with the same shape as `out`
+    """
+    np.bitwise_and(img[..., 0], 0xF8, out=out, dtype=np.uint16)
+    np.left_shift(out, 8, out=out)
+    np.bitwise_and(img[..., 1], 0xFC, out=scratch, dtype=np.uint16)
+    np.left_shift(scratch, 3, out=scratch)
+    np.bitwise_or(out, scratch, out=out)
+    np.right_shift(img[..., 2], 3, out=scratch, dtype=np.uint16)
+    np.bitwise_or(out, scratch, out=out)
+
+
+def encode(img, byteswap=True):
+    """Encode a (small) RGB array in a new RGB565 array
+
+    Parameters
+    ----------
+    img: np.array
+        RGB or RGBA array of shape (height, width, 3 or 4)
+    byteswap: bool
+        See `RGB565Encoder`. Default is True
+
+    Returns
+    -------
+    out: np.array
+        uint16 array of shape (height, width)
+    """
+    out = np.empty(img.shape[:2], dtype=np.uint16)
+    pack(img, out, np.empty_like(out))
+    if byteswap:
+        out.byteswap(inplace=True)
+    return out
+
+
+def decode(pix, byteswap=True):
+    """Decode RGB565 pixels
+
+    The low bits are filled by repeating the high bits, so that
+    encoding the result gives back the same pixels.
+
+    Parameters
+    ----------
+    pix: np.array
+        uint16 array of shape (height, width)
+    byteswap: bool
+        See `RGB565Encoder`. Default is True
+
+    Returns
+    -------
+    out: np.array
+        RGB array of shape (height, width, 3) and type uint8
+    """
+    if byteswap:
+        pix = pix.byteswap()
+    r = (pix >> 11) & 0x1F
+    g = (pix >> 5) & 0x3F
+    b = pix & 0x1F
+    return np.stack(
+        ((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=-1
+    ).astype(np.uint8)
+
+
+class RGB565Encoder:
+    """Encode images in RGB565, in a preallocated buffer
+
+    The buffer is re-used by each call to `encode`, so the returned
+    view is only valid until the next call.
+
+    PIL images are first copied to an array by `np.asarray` (170 KB
+    for a 240x240 RGB image), then packed by `pack` and byteswapped in
+    place. At 240x240, this takes about 0.37 ms per frame, 0.12 ms of
+    which is the copy. Per-channel lookup tables, which would fold the
+    byteswap into the packing, measured slower than `pack` (0.32 ms
+    against 0.22 ms).
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels
+    height: int
+        Height size in pixels
+    byteswap: bool
+        If True (default), swap the two bytes of each pixel so that the
+        high byte comes first in memory, as the GC9A01 expects over SPI.
+        Use False to keep the native (little-endian) order of Linux
+        framebuffers.
+    """
+
+    def __init__(self, width, height, byteswap=True):
+        self.width = width
+        self.height = height
+        self.byteswap = byteswap
+
+        # Encoded frame, and scratch buffer for the green and blue
+        self.array = np.zeros((height, width), dtype=np.uint16)
+        self._scratch = np.zeros((height, width), dtype=np.uint16)
+
+    def encode(self, image, palette=None):
+        """Encode an image
+
+        Parameters
+        ----------
+        image: PIL.Image or np.array
+            RGB or RGBA image (alpha is ignored), or 8-bit palette image.
+            Arrays must have a shape (height, width, 3 or 4), or
+            (height, width) together with `palette`.
+        palette: list of int
+            Flat list of RGB values for 8-bit arrays. Default is None,
+            in which case it is taken from the `P` image.
+
+        Returns
+        -------
+        out: memoryview
+            Bytes of the encoded frame, ready to be sent
+        """
+        if hasattr(image, "mode"):
+            if image.mode == "P":
+                palette = image.getpalette()
+            elif image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGB")
+        img = np.asarray(image)
+
+        if img.shape[:2] != (self.height, self.width):
+            raise ValueError(
+                "Image must be {}x{}, got {}x{}".format(
+                    self.width, self.height, img.shape[1], img.shape[0]
+                )
+            )
+
+        out = self.array
+        if img.ndim == 2:
+            if palette is None:
+                raise ValueError("A palette is required for 8-bit images")
+            np.take(rgb565_lut(palette), img, out=out)
+        else:
+            pack(img, out, self._scratch)
+
+        if self.byteswap:
+            out.byteswap(inplace=True)
+
+        return memoryview(out).cast("B")
@@ -14,8 +14,24 @@
 # limitations under the License.
 """Various utilities"""
 
+import os
+from functools import lru_cache
+
 from PIL import Image
 
+from fink_watch.rgb565 import RGB565Encoder
+
+LOGO_PATH = "pictures/Fink_SecondaryLogo_WEB.png"
+
+
+@lru_cache(maxsize=4)
+def _logo(width, height):
+    """Decoded and resized logo, shared by all callers"""
+    img = Image.open(LOGO_PATH)
+    img = img.convert("RGBA")
+    img = img.resize((width, height))
+    return img
+
 
 def generate_logo(width=240, height=240):
     """Generate the logo for the screen
@@ -25,11 +41,48 @@ def generate_logo(width=240, height=240):
     out: Image
         240x240 logo
     """
-    img = Image.open("pictures/Fink_SecondaryLogo_WEB.png")
-    img = img.convert("RGBA")
-    img = img.resize((width, height))
-    img = img.rotate(180)
-    return img
+    return _logo(width, height).copy()
+
+
+@lru_cache(maxsize=4)
+def encoded_logo(width=240, height=240, cache_dir=None):
+    """Logo encoded in RGB565, ready to be sent to the screen
+
+    Parameters
+    ----------
+    width: int
+        Width size in pixels. Default is 240
+    height: int
+        Height size in pixels. Default is 240
+    cache_dir: str
+        If set, the encoded logo is also stored in this folder, and
+        read from there as long as it is newer than the PNG file.
+        Default is None.
+
+    Returns
+    -------
+    out: bytes
+        RGB565 frame, high byte first
+    """
+    if cache_dir is not None:
+        name = os.path.splitext(os.path.basename(LOGO_PATH))[0]
+        path = os.path.join(cache_dir, "{}_{}x{}.rgb565".format(name, width, height))
+        if (
+            os.path.exists(path)
+            and os.path.getsize(path) == width * height * 2
+            and os.path.getmtime(path) >= os.path.getmtime(LOGO_PATH)
+        ):
+            with open(path, "rb") as f:
+                return f.read()
+
+    data = bytes(RGB565Encoder(width, height).encode(_logo(width, height)))
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    return data
 
 
 def scale(size, pc):
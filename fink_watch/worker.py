@@ -0,0 +1,162 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Send frames to the screen from a background thread"""
+
+import logging
+import threading
+
+import numpy as np
+
+from fink_watch.metrics import Metrics
+
+
+class DisplayWorker:
+    """Thread owning the screen, fed with the latest frame
+
+    Frames are kept in two slots: the one being sent, and the next
+    one. Submitting a frame while the next slot is still waiting
+    replaces it (the latest frame wins), so the caller never waits for
+    the SPI transfer, and can render the next frame meanwhile.
+
+    Once started, the screen must only be used through the worker,
+    until `stop` returns.
+
+    Parameters
+    ----------
+    disp: LCD_1inch28
+        Initialized screen
+    gap: int
+        See `LCD_1inch28.ShowImageDiff`. Default is 8
+    metrics: Metrics
+        Where to record the encode and send stages, and the bytes
+        sent. Default is None, meaning a private instance
+    """
+
+    def __init__(self, disp, gap=8, metrics=None):
+        self.disp = disp
+        self.gap = gap
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        # Encoded frames, for the buffers which are re-used by the caller
+        self._slots = [
+            np.zeros((disp.height, disp.width), dtype=np.uint16) for _ in range(2)
+        ]
+        self._sending = 0
+        self._pending = None
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="display", daemon=True)
+
+        self.shown = 0
+        self.dropped = 0
+        self.error = None
+
+    def start(self):
+        """Start the thread"""
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Send the pending frame, and stop the thread
+
+        Parameters
+        ----------
+        timeout: float
+            Maximum time to wait, in seconds. Default is None, meaning
+            no limit
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _submit(self, kind, payload=None, buffer=None):
+        """Replace the next frame
+
+        Encoded frames are copied in the slot which is not being sent.
+        """
+        if self.error is not None:
+            raise self.error
+        with self._condition:
+            if buffer is not None:
+                payload = 1 - self._sending
+                pix = np.frombuffer(buffer, dtype=np.uint16)
+                np.copyto(self._slots[payload], pix.reshape(self._slots[payload].shape))
+            if self._pending is not None:
+                self.dropped += 1
+                self.metrics.count("frames_dropped")
+            self._pending = (kind, payload)
+            self._condition.notify()
+
+    def show_image(self, image):
+        """Display an image, sending only the regions that changed
+
+        Parameters
+        ----------
+        image: PIL.Image
+            Image to display. It must not be modified afterwards.
+        """
+        self._submit("image", image)
+
+    def show_buffer(self, buffer, diff=True):
+        """Display an encoded frame
+
+        Parameters
+        ----------
+        buffer: bytes-like
+            Full RGB565 frame, high byte first. It is copied, and can
+            be re-used as soon as the function returns.
+        diff: bool
+            If True (default), only send the regions that changed.
+            Otherwise send the full frame.
+        """
+        self._submit("diff" if diff else "full", buffer=buffer)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                kind, payload = self._pending
+                self._pending = None
+                if kind != "image":
+                    self._sending = payload
+
+            try:
+                if kind == "image":
+                    with self.metrics.time("encode"):
+                        pix = self.disp.rgb565(payload)
+                    with self.metrics.time("send"):
+                        boxes = self.disp.ShowBufferDiff(pix, gap=self.gap)
+                elif kind == "diff":
+                    with self.metrics.time("send"):
+                        boxes = self.disp.ShowBufferDiff(
+                            self._slots[payload], gap=self.gap
+                        )
+                else:
+                    with self.metrics.time("send"):
+                        self.disp.ShowBuffer(self._slots[payload])
+                    boxes = [(0, 0, self.disp.width, self.disp.height)]
+                self.metrics.count(
+                    "bytes_sent",
+                    sum(2 * (x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in boxes),
+                )
+                self.shown += 1
+            except Exception as e:
+                logging.error("Display worker stopped: {}".format(e))
+                self.error = e
+                return
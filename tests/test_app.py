@@ -0,0 +1,46 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests of the command line"""
+
+import pytest
+
+from app import parse_args
+
+
+@pytest.mark.parametrize("cycle", ["0", "-5", "nan"])
+def test_cycle_must_be_positive(cycle, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["-cycle", cycle])
+    assert "-cycle" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["-topic", "a", "b", "-observatory", "ZTF", "Rubin", "ZTF"],
+        ["-topic", "a", "b", "c", "-alert_per_deg", "1", "2"],
+        ["-topic", "a", "-observatory", "ZTF", "Rubin"],
+    ],
+)
+def test_one_value_per_topic(argv, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+    assert "one per topic" in capsys.readouterr().err
+
+
+def test_valid_faces():
+    args = parse_args(["-topic", "a", "b", "-observatory", "ZTF", "Rubin"])
+    assert args.alert_per_deg == [1000]
+    assert parse_args(["-cycle", "2.5"]).cycle == 2.5
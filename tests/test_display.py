@@ -0,0 +1,38 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests of the watch face"""
+
+import datetime
+
+import numpy as np
+
+from fink_watch.colors import default_palette
+from fink_watch.display import screen, text_items
+
+NOW = datetime.datetime(2025, 1, 1, 12, 34)
+RED = (255, 0, 0)
+
+
+def test_text_follows_the_palette():
+    palette = default_palette._replace(text=RED)
+    items = text_items(240, 240, 120000, "ZTF", NOW, palette=palette)
+    assert {color for *_, color in items} == {RED}
+
+    def red_pixels(palette):
+        image = screen(progression=120000, observatory="ZTF", now=NOW, palette=palette)
+        return np.all(np.asarray(image) == RED, axis=-1).sum()
+
+    assert red_pixels(default_palette) == 0
+    assert red_pixels(palette) > 100
@@ -0,0 +1,35 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests of the metrics"""
+
+import logging
+
+from fink_watch.metrics import Metrics
+
+
+def test_gauges(caplog):
+    metrics = Metrics()
+    metrics.gauge("alerts_per_second", 1.5, topic="fink_ztf")
+    metrics.gauge("alerts_per_second", 2.5, topic="fink_rubin")
+    metrics.gauge("alerts_per_second", 3.0, topic="fink_ztf")
+
+    text = metrics.prometheus()
+    assert text.count("# TYPE fink_watch_alerts_per_second gauge") == 1
+    assert 'fink_watch_alerts_per_second{topic="fink_ztf"} 3.000000' in text
+    assert 'fink_watch_alerts_per_second{topic="fink_rubin"} 2.500000' in text
+
+    with caplog.at_level(logging.INFO):
+        metrics.log()
+    assert "alerts_per_second_fink_ztf=3.00" in caplog.text
@@ -0,0 +1,65 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests of the Kafka polling"""
+
+import concurrent.futures
+import time
+import types
+
+import confluent_kafka
+import pytest
+
+from fink_watch import poll
+
+
+class SlowAdminClient:
+    """Admin client of a broker answering each request after `delay`"""
+
+    delay = 0.15
+
+    def __init__(self, config):
+        self.calls = []
+
+    def list_topics(self, topic=None, timeout=-1):
+        self.calls.append(timeout)
+        if timeout < self.delay:
+            time.sleep(timeout)
+            raise confluent_kafka.KafkaException(
+                confluent_kafka.KafkaError(confluent_kafka.KafkaError._TIMED_OUT)
+            )
+        time.sleep(self.delay)
+        metadata = types.SimpleNamespace(error=None, partitions={0: None})
+        return types.SimpleNamespace(topics={topic: metadata})
+
+    def list_offsets(self, topic_partition_offsets, request_timeout=None):
+        futures = {}
+        for tp in topic_partition_offsets:
+            futures[tp] = concurrent.futures.Future()
+        return futures
+
+
+def test_poll_has_one_deadline(monkeypatch):
+    monkeypatch.setattr(confluent_kafka.admin, "AdminClient", SlowAdminClient)
+    tracker = poll.OffsetTracker({}, ["a", "b", "c"], timeout=0.2)
+
+    start = time.monotonic()
+    with pytest.raises(confluent_kafka.KafkaException):
+        tracker.poll()
+    elapsed = time.monotonic() - start
+
+    # Not one timeout per topic, then one for the offsets
+    assert elapsed < 0.3
+    assert sum(tracker.client.calls) < 0.3 + 1e-3
+    assert tracker.partitions is None
@@ -0,0 +1,70 @@
+# Copyright 2025 Julien Peloton
+# Author: Julien Peloton
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests of the rate estimation and of the polling interval"""
+
+from fink_watch.poll import Poller
+from fink_watch.rate import AdaptiveInterval, RateEstimator
+
+
+class Tracker:
+    """Stand-in for `poll.OffsetTracker`, never polled"""
+
+    topics = ("fink_ztf",)
+
+    def close(self):
+        pass
+
+
+def test_retry_reaches_the_cap_and_resets():
+    schedule = AdaptiveInterval(1, 300, max_retry=300)
+    retries = [schedule.retry() for _ in range(12)]
+    assert retries[:4] == [1, 2, 4, 8]
+    assert retries[-1] == 300
+    assert max(retries) == 300
+
+    # The first success forgets the backoff
+    assert schedule.update(True) == 1
+    assert schedule.retry() == 1
+
+
+def test_retry_leaves_the_polling_interval():
+    schedule = AdaptiveInterval(1, 300, max_retry=30)
+    for _ in range(3):
+        schedule.update(False)
+    assert schedule.current == 8
+    for _ in range(10):
+        schedule.retry()
+    assert schedule.retry() == 30
+    assert schedule.update(False) == 16
+
+
+def test_poller_retries_up_to_the_longest_interval():
+    poller = Poller(Tracker(), interval=1, max_interval=300)
+    assert poller.schedule.max_retry == 300
+
+    poller = Poller(Tracker(), interval=1, max_interval=300, max_retry=60)
+    assert poller.schedule.max_retry == 60
+
+
+def test_windowed_rate():
+    estimator = RateEstimator()
+    assert estimator.windowed() is None
+    # 10 alerts per second for 100 s, then 100 per second for 30 s
+    for t in range(100):
+        estimator.add(t, 10 * t)
+    for t in range(100, 131):
+        estimator.add(t, 990 + 100 * (t - 99))
+    assert estimator.windowed(30) == 100
+    assert estimator.windowed(60) == (4090 - 700) / 60